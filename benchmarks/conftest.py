@@ -0,0 +1,163 @@
+"""
+Fixtures for the hot-path benchmarks.
+
+    python -m pytest benchmarks -s
+
+Scale and targets come from the environment:
+
+BENCH_USERS            users (each with one account) to seed, default 10000
+BENCH_TRANSACTIONS     transactions to seed, default 100000
+BENCH_ITERATIONS       calls per benchmark, default 200
+BENCH_CONCURRENCY      client threads against gunicorn, default 8
+BENCH_DATABASE_URL     database to seed and benchmark, default a temporary SQLite file
+BENCH_RESULTS          JSON file the results are written to, default benchmarks/results.json
+BENCH_BASELINE         JSON results to compare against, default benchmarks/baseline.json
+BENCH_REGRESSION_THRESHOLD  allowed p99/throughput regression, default 0.2 (20%)
+"""
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+# Benchmarks run against LocalConfig unless told otherwise
+os.environ.setdefault('ENV', 'local')
+
+from benchmarks import harness
+from iebank_api import create_app, db
+from iebank_api.models import Account, Transaction, User
+from iebank_api.money import Money
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+CHUNK = 10000
+PASSWORD = 'Password123'
+OPENING_BALANCE = Money('1000000.00')
+
+SCALE = {
+    "users": int(os.getenv('BENCH_USERS', '10000')),
+    "transactions": int(os.getenv('BENCH_TRANSACTIONS', '100000')),
+    "iterations": int(os.getenv('BENCH_ITERATIONS', '200')),
+    "concurrency": int(os.getenv('BENCH_CONCURRENCY', '8')),
+}
+
+# Every benchmark login comes from one address; keep the login rate limiter out of the way
+UNLIMITED = {'LOGIN_RATE_LIMIT_IP': 10 ** 9, 'LOGIN_RATE_LIMIT_USER': 10 ** 9}
+
+recorder = harness.Recorder(meta=dict(SCALE))
+
+
+def _chunks(rows):
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+
+def seed(users, transactions):
+    """
+    Bulk-insert users, one funded account each, and random transactions
+    between them, CHUNK rows per INSERT. All users share one password hash
+    so seeding does not spend minutes hashing.
+    """
+    template = User(username='template')
+    template.set_password(PASSWORD)
+    password_hash = template.password_hash
+
+    user_rows = [{"username": f"user{i}", "password_hash": password_hash, "is_admin": i == 0} for i in range(users)]
+    for chunk in _chunks(user_rows):
+        db.session.execute(insert(User), chunk)
+
+    account_rows = [{
+        "id": i + 1, "name": f"Account {i}", "account_number": f"{i:020d}", "balance": OPENING_BALANCE,
+        "currency": "€", "status": "Active", "created_at": datetime.utcnow(), "country": "Spain", "user_id": i + 1,
+    } for i in range(users)]
+    for chunk in _chunks(account_rows):
+        db.session.execute(insert(Account), chunk)
+
+    rng = random.Random(42)
+    start = datetime.utcnow() - timedelta(days=365)
+    transaction_rows = []
+    for _ in range(transactions):
+        sender, receiver = rng.sample(range(users), 2)
+        transaction_rows.append({
+            "sender": f"{sender:020d}", "receiver": f"{receiver:020d}",
+            "sender_account_id": sender + 1, "receiver_account_id": receiver + 1, "amount": Money('1.00'),
+            "transaction_date": start + timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+        })
+    for chunk in _chunks(transaction_rows):
+        db.session.execute(insert(Transaction), chunk)
+    db.session.commit()
+
+
+@pytest.fixture(scope='session')
+def database_uri(tmp_path_factory):
+    return os.getenv('BENCH_DATABASE_URL', f"sqlite:///{tmp_path_factory.mktemp('bench') / 'bench.db'}")
+
+
+@pytest.fixture(scope='session')
+def bench_app(database_uri):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_uri, 'TELEMETRY_ENABLED': False, **UNLIMITED})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = time.perf_counter()
+        seed(max(SCALE["users"], 2), SCALE["transactions"])
+        print(f"\nSeeded {SCALE['users']} users/accounts and {SCALE['transactions']} transactions "
+              f"in {time.perf_counter() - started:.1f}s")
+    yield app
+
+
+@pytest.fixture(scope='session')
+def gunicorn_url(bench_app, database_uri):
+    """
+    A local gunicorn serving the seeded database, or skip if it cannot start.
+    """
+    pytest.importorskip('gunicorn')
+    port = int(os.getenv('BENCH_GUNICORN_PORT', '5066'))
+    env = dict(os.environ, ENV='local', LOCAL_DATABASE_URI=database_uri, TELEMETRY_ENABLED='False', PYTHONPATH=ROOT,
+               **{key: str(value) for key, value in UNLIMITED.items()})
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f"127.0.0.1:{port}"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while True:
+        try:
+            urllib.request.urlopen(f"{base_url}/api/", timeout=1).read()
+            break
+        except OSError:
+            if time.time() > deadline or process.poll() is not None:
+                process.terminate()
+                pytest.skip("gunicorn did not start")
+            time.sleep(0.2)
+    yield base_url
+    process.terminate()
+    process.wait(timeout=30)
+
+
+@pytest.fixture(scope='session')
+def record():
+    return recorder.record
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not recorder.results:
+        return
+    results_path = os.getenv('BENCH_RESULTS', os.path.join(HERE, 'results.json'))
+    recorder.write(results_path)
+    print(f"\nBenchmark results written to {results_path}")
+
+    baseline = harness.load_baseline(os.getenv('BENCH_BASELINE', os.path.join(HERE, 'baseline.json')))
+    if baseline is None:
+        return
+    threshold = float(os.getenv('BENCH_REGRESSION_THRESHOLD', '0.2'))
+    found = harness.regressions(recorder.results, baseline, threshold)
+    for line in found:
+        print(f"REGRESSION {line}")
+    if found:
+        session.exitstatus = 1
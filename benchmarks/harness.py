@@ -0,0 +1,96 @@
+"""
+Shared helpers for the benchmark suite: timing, summaries, the JSON results
+file and comparison against a stored baseline.
+"""
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_load(operation, iterations, concurrency=1):
+    """
+    Call operation() iterations times from concurrency threads.
+    Returns (latency samples in ms, wall-clock seconds).
+    """
+    samples = []
+    lock = threading.Lock()
+    remaining = iter(range(iterations))
+
+    def worker():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            operation()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                samples.append(elapsed)
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        worker()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(concurrency):
+                pool.submit(worker)
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    return {
+        "samples": len(samples),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+    }
+
+
+class Recorder:
+    """
+    Collects one summary per benchmark name and writes them to a JSON file.
+    """
+
+    def __init__(self, meta=None):
+        self.meta = meta or {}
+        self.results = {}
+
+    def record(self, name, samples, elapsed):
+        self.results[name] = summarize(samples, elapsed)
+        return self.results[name]
+
+    def write(self, path):
+        with open(path, 'w') as handle:
+            json.dump({"meta": self.meta, "results": self.results}, handle, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)["results"]
+
+
+def regressions(results, baseline, threshold):
+    """
+    Benchmarks whose p99 latency grew, or throughput fell, by more than
+    threshold (0.2 = 20%) relative to the baseline.
+    """
+    found = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            found.append(f"{name}: p99 {current['p99_ms']} ms vs baseline {base['p99_ms']} ms")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            found.append(f"{name}: {current['throughput_rps']} req/s vs baseline {base['throughput_rps']} req/s")
+    return found
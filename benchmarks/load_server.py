@@ -0,0 +1,134 @@
+"""
+Throughput of GET /api/accounts/ on the Flask dev server vs gunicorn.
+
+Seeds a throwaway SQLite database, starts each server as a subprocess on a
+local port, drives it with concurrent HTTP clients for a fixed duration and
+prints requests/sec with p50/p99 latency.
+
+    python -m benchmarks.load_server --accounts 500 --concurrency 16 --duration 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.harness import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _server_env(database_uri):
+    env = dict(os.environ)
+    env.update({
+        'ENV': 'local',
+        'LOCAL_DATABASE_URI': database_uri,
+        'TELEMETRY_ENABLED': 'False',
+        'PYTHONPATH': ROOT,
+    })
+    return env
+
+
+def seed(database_uri, accounts):
+    os.environ.update(_server_env(database_uri))
+    from iebank_api import create_app, db
+    from iebank_api.models import Account, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        admin = User(username='bench', is_admin=True)
+        admin.set_password('Password123')
+        db.session.add(admin)
+        db.session.add_all(Account(f'Bench {i}', '€', 'Spain') for i in range(accounts))
+        db.session.commit()
+
+
+def _request(url, data=None, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json", **(headers or {})})
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return response.read()
+
+
+def _wait_until_up(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _request(f"{base_url}/api/")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def drive(base_url, concurrency, duration):
+    login = json.loads(_request(f"{base_url}/api/login/", {"username": "bench", "password": "Password123"}))
+    headers = {"Authorization": f"Bearer {login['access_token']}"}
+    samples = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client():
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            try:
+                _request(f"{base_url}/api/accounts/", headers=headers)
+            except OSError as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                samples.append((time.perf_counter() - started) * 1000)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    return samples, errors
+
+
+def run(label, command, env, port, concurrency, duration):
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_up(base_url)
+        samples, errors = drive(base_url, concurrency, duration)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    if not samples:
+        print(f"{label:10} no successful requests ({len(errors)} errors)")
+        return
+    print(f"{label:10} {len(samples) / duration:8.1f} req/s   p50 {statistics.median(samples):8.2f} ms   "
+          f"p99 {percentile(samples, 0.99):8.2f} ms   errors {len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_uri = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        seed(database_uri, args.accounts)
+        env = _server_env(database_uri)
+
+        run("dev server", [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(args.port)],
+            env, args.port, args.concurrency, args.duration)
+        run("gunicorn", [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                         '--bind', f"127.0.0.1:{args.port}"],
+            env, args.port, args.concurrency, args.duration)
+
+
+if __name__ == '__main__':
+    main()
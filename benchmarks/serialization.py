@@ -0,0 +1,109 @@
+"""
+Cost of turning a listing into JSON: ORM entities + stdlib json (the old
+path) vs column rows + stdlib json vs column rows + orjson.
+
+Seeds an in-memory database, then times query + payload building + dumps
+for the accounts and transactions listings and prints p50/p99 per call and
+the cost per row.
+
+    ENV=ghci python -m benchmarks.serialization --rows 5000 --repeat 50
+"""
+import argparse
+import logging
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert, select
+
+from benchmarks.harness import percentile
+from iebank_api import create_app, db, serializers
+from iebank_api.models import Account, Transaction
+from iebank_api.money import Money
+
+
+class StdlibJSONProvider(serializers.JSONProvider):
+    """
+    The provider with orjson switched off.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return DefaultJSONProvider.dumps(self, obj, **kwargs)
+
+
+def seed(rows):
+    now = datetime.utcnow()
+    db.session.execute(insert(Account), [{
+        "name": f"Account {i}", "account_number": f"{i:020d}", "balance": Money('1234.56'), "currency": "€",
+        "status": "Active", "created_at": now, "country": "Spain",
+    } for i in range(rows)])
+    db.session.execute(insert(Transaction), [{
+        "sender": f"{i:020d}", "receiver": f"{i + 1:020d}", "amount": Money('12.34'),
+        "transaction_date": now - timedelta(minutes=i),
+    } for i in range(rows)])
+    db.session.commit()
+
+
+def _time(label, repeat, rows, run):
+    run()  # warm up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"{label:34} p50 {statistics.median(samples):8.2f} ms   p99 {percentile(samples, 0.99):8.2f} ms   "
+          f"{statistics.median(samples) * 1000 / rows:6.2f} us/row")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    # The model constructors log every instance; keep the console out of the measurement
+    logging.disable(logging.INFO)
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'TELEMETRY_ENABLED': False})
+    stdlib, fast = StdlibJSONProvider(app), serializers.JSONProvider(app)
+    if serializers.orjson is None:
+        print("orjson is not installed; the last column measures the stdlib fallback")
+
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+
+        def orm_accounts(provider):
+            accounts = Account.query.order_by(Account.id).all()
+            provider.dumps({"accounts": [serializers.account_payload(
+                (account.id, account.name, account.account_number, account.balance, account.currency,
+                 account.status, account.created_at, account.country)
+            ) for account in accounts]})
+            db.session.expunge_all()
+
+        def row_accounts(provider):
+            accounts = db.session.execute(select(*serializers.ACCOUNT_COLUMNS).order_by(Account.id)).all()
+            provider.dumps({"accounts": [serializers.account_payload(account) for account in accounts]})
+
+        def orm_transactions(provider):
+            transactions = Transaction.query.order_by(Transaction.transaction_date.desc()).all()
+            provider.dumps({"transactions": [serializers.transaction_payload(
+                (row.id, row.sender, row.receiver, row.amount, row.transaction_date)
+            ) for row in transactions]})
+            db.session.expunge_all()
+
+        def row_transactions(provider):
+            transactions = db.session.execute(
+                select(*serializers.TRANSACTION_COLUMNS).order_by(Transaction.transaction_date.desc())
+            ).all()
+            provider.dumps({"transactions": [serializers.transaction_payload(row) for row in transactions]})
+
+        for name, orm, rows in [("accounts", orm_accounts, row_accounts),
+                                ("transactions", orm_transactions, row_transactions)]:
+            _time(f"{name}: ORM entities + json", args.repeat, args.rows, lambda: orm(stdlib))
+            _time(f"{name}: column rows + json", args.repeat, args.rows, lambda: rows(stdlib))
+            _time(f"{name}: column rows + orjson", args.repeat, args.rows, lambda: rows(fast))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Request latency with telemetry off vs on.
+
+Drives the Flask test client against a few endpoints with the telemetry
+pipeline disabled and then enabled (stub exporter, every request sampled),
+and prints p50/p99 latency for both. Nothing leaves the machine.
+
+    ENV=ghci python -m benchmarks.telemetry_overhead --requests 2000
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from benchmarks.harness import percentile
+from iebank_api import create_app, db
+from iebank_api.models import User
+
+
+def _measure(telemetry_enabled, requests):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'TELEMETRY_ENABLED': telemetry_enabled,
+        'TELEMETRY_EXPORTER': 'stub',
+        'TELEMETRY_DEFAULT_SAMPLE_RATE': 1.0,
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', is_admin=True)
+        user.set_password('Password123')
+        db.session.add(user)
+        db.session.commit()
+
+        client = app.test_client()
+        token = client.post('/api/login/', json={"username": "bench", "password": "Password123"}).get_json()['access_token']
+        headers = {"Authorization": f"Bearer {token}"}
+
+        samples = []
+        for i in range(requests):
+            path = '/api/' if i % 2 else '/api/accounts/'
+            started = time.perf_counter()
+            client.get(path, headers=headers)
+            samples.append((time.perf_counter() - started) * 1000)
+
+        pipeline = app.extensions.get('telemetry')
+        if pipeline is not None:
+            pipeline.flush()
+        return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    # Console logging of every request would dwarf the difference being measured
+    logging.getLogger('iebank_api').setLevel(logging.WARNING)
+
+    for label, enabled in [("telemetry off", False), ("telemetry on", True)]:
+        samples = _measure(enabled, args.requests)
+        print(f"{label:14} p50 {statistics.median(samples):7.3f} ms   p99 {percentile(samples, 0.99):7.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+p50/p99 latency and throughput of the banking API hot paths, through the
+Flask test client (one thread) and through a local gunicorn (BENCH_CONCURRENCY
+client threads).
+"""
+import json
+import urllib.request
+
+import pytest
+
+from benchmarks.conftest import PASSWORD, SCALE
+from benchmarks import harness
+
+# user1 owns account 1 and sends from it; user0 is the admin
+SENDER = f"{1:020d}"
+RECIPIENT = f"{2:020d}"
+
+OPERATIONS = {
+    "login": ("POST", "/api/login/", {"username": "user1", "password": PASSWORD}, None),
+    "transfer_money": ("POST", "/api/transfer/",
+                       {"sender_account_number": SENDER, "recipient_account_number": RECIPIENT, "amount": 0.01}, "user1"),
+    "deposit": ("POST", "/api/deposit/", {"account_number": SENDER, "amount": 0.01}, "user1"),
+    "get_accounts": ("GET", "/api/accounts/?limit=100", None, "user0"),
+    "get_user_transactions": ("GET", "/api/user/transactions/?limit=50", None, "user1"),
+}
+
+
+def _client_call(client, tokens, name):
+    method, path, body, user = OPERATIONS[name]
+    headers = {"Authorization": f"Bearer {tokens[user]}"} if user else {}
+
+    def call():
+        response = client.open(path, method=method, json=body, headers=headers)
+        assert response.status_code < 300, response.get_data(as_text=True)
+    return call
+
+
+def _http_call(base_url, tokens, name):
+    method, path, body, user = OPERATIONS[name]
+    headers = {"Content-Type": "application/json"}
+    if user:
+        headers["Authorization"] = f"Bearer {tokens[user]}"
+    data = json.dumps(body).encode() if body is not None else None
+
+    def call():
+        request = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+    return call
+
+
+@pytest.fixture(scope='module')
+def client_tokens(bench_app):
+    client = bench_app.test_client()
+    return {
+        user: client.post('/api/login/', json={"username": user, "password": PASSWORD}).get_json()['access_token']
+        for user in ("user0", "user1")
+    }
+
+
+@pytest.mark.parametrize('name', list(OPERATIONS))
+def test_test_client(bench_app, client_tokens, record, name):
+    client = bench_app.test_client()
+    call = _client_call(client, client_tokens, name)
+    call()  # warm up
+    samples, elapsed = harness.run_load(call, SCALE["iterations"])
+    print(f"\nclient:{name} {record(f'client:{name}', samples, elapsed)}")
+
+
+@pytest.mark.parametrize('name', list(OPERATIONS))
+def test_gunicorn(gunicorn_url, client_tokens, record, name):
+    call = _http_call(gunicorn_url, client_tokens, name)
+    call()  # warm up
+    samples, elapsed = harness.run_load(call, SCALE["iterations"], SCALE["concurrency"])
+    print(f"\ngunicorn:{name} {record(f'gunicorn:{name}', samples, elapsed)}")
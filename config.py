@@ -1,52 +1,130 @@
 import os
 import urllib.parse
-from azure.identity import DefaultAzureCredential
+
+def engine_options():
+    """
+    Connection pool settings for the Postgres environments.
+
+    Every gunicorn worker process has its own pool and serves at most
+    GUNICORN_THREADS requests at a time, so that is the default pool size.
+    One instance opens at most WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    connections, which is what Postgres max_connections has to cover.
+    """
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', threads)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '2')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        # Azure Database for PostgreSQL drops idle connections; recycle before that
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'True').lower() in ['true', '1', 't'],
+    }
 
 class Config(object): 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     DEBUG = False
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
+    # Upper bound for ?limit= on paginated listings
+    ACCOUNTS_PAGE_MAX_LIMIT = int(os.getenv('ACCOUNTS_PAGE_MAX_LIMIT', '1000'))
+    # Rows fetched per round trip when streaming NDJSON listings
+    STREAM_YIELD_PER = int(os.getenv('STREAM_YIELD_PER', '1000'))
+    # Largest number of operations accepted by the batch transfer/deposit endpoints
+    BATCH_MAX_OPERATIONS = int(os.getenv('BATCH_MAX_OPERATIONS', '1000'))
+    # Users inserted per statement and commit by the bulk import endpoint and CLI
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+    # Seconds the admin dashboard aggregates are reused, and the longest day range they cover
+    ADMIN_STATS_CACHE_TTL = int(os.getenv('ADMIN_STATS_CACHE_TTL', '30'))
+    ADMIN_STATS_MAX_DAYS = int(os.getenv('ADMIN_STATS_MAX_DAYS', '366'))
+    # Responses to requests with an Idempotency-Key are replayed for this many seconds
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400'))
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000'))
+    # Expired keys are deleted at most this often per process, this many per sweep
+    IDEMPOTENCY_SWEEP_INTERVAL = int(os.getenv('IDEMPOTENCY_SWEEP_INTERVAL', '60'))
+    IDEMPOTENCY_SWEEP_BATCH = int(os.getenv('IDEMPOTENCY_SWEEP_BATCH', '1000'))
+    # Ledger entries younger than this (seconds) are not folded into a checkpoint yet
+    LEDGER_CHECKPOINT_LAG = int(os.getenv('LEDGER_CHECKPOINT_LAG', '300'))
+    # Transactions older than this many days are moved to transaction_archive, in chunks of this many rows
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '365'))
+    ARCHIVE_CHUNK_SIZE = int(os.getenv('ARCHIVE_CHUNK_SIZE', '5000'))
+    # Monthly partitions of the transaction table created ahead of time (Postgres)
+    TRANSACTION_PARTITIONS_AHEAD = int(os.getenv('TRANSACTION_PARTITIONS_AHEAD', '3'))
+    # Seconds between partition maintenance passes in the gunicorn master
+    TRANSACTION_PARTITIONS_INTERVAL = int(os.getenv('TRANSACTION_PARTITIONS_INTERVAL', '86400'))
+    # Per-process cache of JWT user id -> user and account numbers
+    PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', '10000'))
+    PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', '30'))
+    # Werkzeug hash method for new and upgraded passwords; older hashes are upgraded on login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Threads that hash/verify passwords and how many more requests may wait before a 503
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '32'))
+    # Of those, the most a bulk user import may hold at once; the rest stay free for logins
+    PASSWORD_HASH_BULK_SLOTS = int(os.getenv('PASSWORD_HASH_BULK_SLOTS', '1'))
+    # Login attempts per client IP, and failed attempts per username, within a sliding window (seconds)
+    LOGIN_RATE_LIMIT_IP = int(os.getenv('LOGIN_RATE_LIMIT_IP', '30'))
+    LOGIN_RATE_LIMIT_IP_WINDOW = int(os.getenv('LOGIN_RATE_LIMIT_IP_WINDOW', '60'))
+    LOGIN_RATE_LIMIT_USER = int(os.getenv('LOGIN_RATE_LIMIT_USER', '5'))
+    LOGIN_RATE_LIMIT_USER_WINDOW = int(os.getenv('LOGIN_RATE_LIMIT_USER_WINDOW', '300'))
+    # Most IPs/usernames tracked per process before the least recently seen are dropped
+    LOGIN_RATE_LIMIT_KEYS = int(os.getenv('LOGIN_RATE_LIMIT_KEYS', '100000'))
+    # Usernames not found at login are answered from memory for this long. The
+    # cache is per process and only the worker that creates a user clears it,
+    # so keep it short: other workers refuse a new user's logins until it expires
+    UNKNOWN_USER_CACHE_SIZE = int(os.getenv('UNKNOWN_USER_CACHE_SIZE', '10000'))
+    UNKNOWN_USER_CACHE_TTL = int(os.getenv('UNKNOWN_USER_CACHE_TTL', '5'))
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are trusted
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', '0'))
+    # Application Insights telemetry, exported in batches by a background thread
+    TELEMETRY_ENABLED = os.getenv('TELEMETRY_ENABLED', 'True').lower() in ['true', '1', 't']
+    TELEMETRY_EXPORTER = os.getenv('TELEMETRY_EXPORTER', 'azure')
+    APPLICATIONINSIGHTS_CONNECTION_STRING = os.getenv(
+        'APPLICATIONINSIGHTS_CONNECTION_STRING',
+        f"InstrumentationKey={os.getenv('APPINSIGHTS_INSTRUMENTATIONKEY', '00000000-0000-0000-0000-000000000000')}")
+    TELEMETRY_DEFAULT_SAMPLE_RATE = float(os.getenv('TELEMETRY_DEFAULT_SAMPLE_RATE', '0.1'))
+    # Per-endpoint overrides, e.g. "api.transfer_money=1.0,api.home=0"
+    TELEMETRY_SAMPLE_RATES = os.getenv('TELEMETRY_SAMPLE_RATES', 'api.transfer_money=1.0,api.deposit=1.0')
+    TELEMETRY_MAX_QUEUE = int(os.getenv('TELEMETRY_MAX_QUEUE', '10000'))
+    TELEMETRY_BATCH_SIZE = int(os.getenv('TELEMETRY_BATCH_SIZE', '100'))
+    TELEMETRY_FLUSH_INTERVAL = float(os.getenv('TELEMETRY_FLUSH_INTERVAL', '1.0'))
+    TELEMETRY_LOG_LEVEL = os.getenv('TELEMETRY_LOG_LEVEL', 'WARNING')
 
 class LocalConfig(Config):
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///local.db'
+    SQLALCHEMY_DATABASE_URI = os.getenv('LOCAL_DATABASE_URI', 'sqlite:///local.db')
     DEBUG = True
 
 class GithubCIConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
     DEBUG = True
+    TELEMETRY_ENABLED = False
+    # Cheap hashing keeps the test suite fast; never use outside CI
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
 
-class DevelopmentConfig(Config):
-    DEBUG = True
+class AzurePostgresConfig(Config):
+    """
+    Azure Database for PostgreSQL with Azure AD authentication. The URI has
+    no password; iebank_api/db_auth.py supplies a cached, background-refreshed
+    access token whenever the pool opens a connection.
+    """
+    DEFAULT_DBNAME = None
+    AZURE_DB_TOKEN_SCOPE = 'https://ossrdbms-aad.database.windows.net'
+    # Refresh the token this many seconds before it expires
+    AZURE_DB_TOKEN_REFRESH_MARGIN = int(os.getenv('AZURE_DB_TOKEN_REFRESH_MARGIN', '300'))
 
     def __init__(self):
-        credential = DefaultAzureCredential()
         dbuser = urllib.parse.quote(os.getenv('DBUSER', 'default_user'))
-        dbpass = credential.get_token(
-            'https://ossrdbms-aad.database.windows.net').token
         dbhost = os.getenv('DBHOST', 'localhost')
-        dbname = os.getenv('DBNAME', 'development_db')
-        self.SQLALCHEMY_DATABASE_URI = f'postgresql://{dbuser}:{dbpass}@{dbhost}/{dbname}'
+        dbname = os.getenv('DBNAME', self.DEFAULT_DBNAME)
+        self.SQLALCHEMY_DATABASE_URI = f'postgresql://{dbuser}@{dbhost}/{dbname}'
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options()
 
-class UATConfig(Config):
+class DevelopmentConfig(AzurePostgresConfig):
     DEBUG = True
+    DEFAULT_DBNAME = 'development_db'
 
-    def __init__(self):
-        credential = DefaultAzureCredential()
-        dbuser = urllib.parse.quote(os.getenv('DBUSER', 'default_user'))
-        dbpass = credential.get_token(
-            'https://ossrdbms-aad.database.windows.net').token
-        dbhost = os.getenv('DBHOST', 'localhost')
-        dbname = os.getenv('DBNAME', 'uat_db')
-        self.SQLALCHEMY_DATABASE_URI = f'postgresql://{dbuser}:{dbpass}@{dbhost}/{dbname}'
+class UATConfig(AzurePostgresConfig):
+    DEBUG = True
+    DEFAULT_DBNAME = 'uat_db'
         
-class ProductionConfig(Config):
+class ProductionConfig(AzurePostgresConfig):
     DEBUG = False
-    def __init__(self):
-        credential = DefaultAzureCredential()
-        dbuser = urllib.parse.quote(os.getenv('DBUSER', 'default_user'))
-        dbpass = credential.get_token(
-            'https://ossrdbms-aad.database.windows.net').token
-        dbhost = os.getenv('DBHOST', 'localhost')
-        dbname = os.getenv('DBNAME', 'production_db')
-        self.SQLALCHEMY_DATABASE_URI = f'postgresql://{dbuser}:{dbpass}@{dbhost}/{dbname}'
-
+    DEFAULT_DBNAME = 'production_db'
@@ -0,0 +1,66 @@
+"""
+Gunicorn settings for the production container:
+
+    gunicorn -c gunicorn.conf.py
+
+Every setting can be overridden from the environment (or GUNICORN_CMD_ARGS).
+"""
+import os
+
+wsgi_app = "iebank_api:create_app()"
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+
+def _cpus():
+    # Respect container CPU affinity where the platform reports it
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Requests spend most of their time waiting on Postgres, so each worker runs
+# a few threads. config.engine_options() sizes each worker's connection pool
+# from the same GUNICORN_THREADS variable, so keep them in step.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', _cpus() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Import the app once in the master; workers fork with the code already
+# loaded, which starts them faster and shares those pages copy-on-write.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() in ['true', '1', 't']
+
+# Recycle workers periodically (with jitter so they do not all restart together)
+# to cap the effect of slow memory growth.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG')
+errorlog = '-'
+
+
+def when_ready(server):
+    """
+    Keep the monthly transaction partitions created ahead (Postgres only)
+    from a single maintenance thread in the master. Workers forked later
+    drop its connections in post_fork.
+    """
+    from iebank_api import partitions
+
+    partitions.start_maintenance(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    """
+    Drop any database connections the master opened while preloading, so
+    forked workers never share a socket; each worker's pool starts empty.
+    """
+    from iebank_api import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -8,8 +8,10 @@ from config import DevelopmentConfig, UATConfig, ProductionConfig
 db = SQLAlchemy()
 jwt = JWTManager()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
+    from iebank_api.serializers import JSONProvider
+    app.json = JSONProvider(app)
 
     # Select environment based on the ENV environment variable
     if os.getenv('ENV') == 'local':
@@ -31,10 +33,40 @@ def create_app():
         prod_config = ProductionConfig()
         app.config.from_object(prod_config)
 
+    # Explicit overrides (tests, tools) must be in place before the engine is created
+    if config:
+        app.config.update(config)
+
+    from iebank_api import metrics
+    metrics.init_app(app)
+
     db.init_app(app)
     jwt.init_app(app)
     CORS(app)
 
+    from iebank_api import db_auth
+    db_auth.init_app(app)
+
+    metrics.register(app, 'db_pool', lambda: {
+        name or 'default': metrics.pool_stats(engine) for name, engine in db.engines.items()
+    })
+
+    from iebank_api import idempotency, passwords, principal, ratelimit, stats, telemetry
+    idempotency.init_app(app)
+    passwords.init_app(app)
+    principal.init_app(app)
+    ratelimit.init_app(app)
+    stats.init_app(app)
+    telemetry.init_app(app)
+
+    from iebank_api import archive, backfill, balances, importer, ledger, partitions
+    app.cli.add_command(archive.archive_transactions_command)
+    app.cli.add_command(partitions.create_transaction_partitions_command)
+    app.cli.add_command(backfill.backfill_transaction_accounts_command)
+    app.cli.add_command(importer.import_users_command)
+    app.cli.add_command(balances.rebuild_balances_command)
+    app.cli.add_command(ledger.verify_ledger_command)
+
     # Register blueprints
     from iebank_api.routes import api
     app.register_blueprint(api, url_prefix='/api')
@@ -0,0 +1,67 @@
+import logging
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select
+from iebank_api import db
+from iebank_api.models import Transaction, TransactionArchive
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('id', 'sender', 'receiver', 'sender_account_id', 'receiver_account_id', 'amount', 'transaction_date')
+
+
+def archive_transactions(horizon_days=None, chunk_size=None, max_chunks=None):
+    """
+    Move transactions older than horizon_days (ARCHIVE_AFTER_DAYS) from the
+    hot table to transaction_archive, oldest first, chunk_size
+    (ARCHIVE_CHUNK_SIZE) rows per INSERT ... SELECT, DELETE and commit, so
+    locks stay short and an interrupted run loses nothing. Stops after
+    max_chunks chunks if given. Returns the number of rows moved.
+    """
+    horizon_days = horizon_days or current_app.config['ARCHIVE_AFTER_DAYS']
+    chunk_size = chunk_size or current_app.config['ARCHIVE_CHUNK_SIZE']
+    cutoff = datetime.utcnow() - timedelta(days=horizon_days)
+    columns = [getattr(Transaction, name) for name in COLUMNS]
+
+    moved = 0
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        # Oldest rows through the transaction_date index; a concurrent run skips locked rows
+        ids = db.session.scalars(
+            select(Transaction.id).where(Transaction.transaction_date < cutoff)
+            .order_by(Transaction.transaction_date, Transaction.id).limit(chunk_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            break
+        try:
+            db.session.execute(insert(TransactionArchive).from_select(
+                COLUMNS, select(*columns).where(Transaction.id.in_(ids))
+            ))
+            db.session.execute(delete(Transaction).where(Transaction.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        moved += len(ids)
+        chunks += 1
+        logger.info(f"Archived {len(ids)} transactions ({moved} so far)")
+    return moved
+
+
+@click.command('archive-transactions')
+@click.option('--days', type=int, default=None, help="Archive transactions older than this many days.")
+@click.option('--chunk-size', type=int, default=None, help="Rows moved per commit.")
+@click.option('--max-chunks', type=int, default=None, help="Stop after this many chunks.")
+@with_appcontext
+def archive_transactions_command(days, chunk_size, max_chunks):
+    """
+    Move old transactions out of the hot table; meant to run on a schedule.
+    """
+    started = time.perf_counter()
+    moved = archive_transactions(days, chunk_size, max_chunks)
+    click.echo(f"Archived {moved} transactions in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,50 @@
+import logging
+import time
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+from iebank_api import db
+from iebank_api.models import Account, Transaction
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10000
+
+
+def transaction_account_ids(batch_size=BATCH_SIZE):
+    """
+    Fill Transaction.sender_account_id/receiver_account_id from the account
+    numbers of rows written before those columns existed. Works through
+    the table in id ranges of batch_size, one commit per range, so it can
+    run next to live traffic and be interrupted and resumed. History of
+    deleted accounts stays NULL. Returns the number of references filled.
+    """
+    last_id = db.session.scalar(select(func.max(Transaction.id))) or 0
+    filled = 0
+    for start in range(0, last_id, batch_size):
+        in_range = (Transaction.id > start, Transaction.id <= start + batch_size)
+        for column, number in [(Transaction.sender_account_id, Transaction.sender),
+                               (Transaction.receiver_account_id, Transaction.receiver)]:
+            # Correlated lookup on the account_number unique index
+            account_id = select(Account.id).where(Account.account_number == number).scalar_subquery()
+            filled += db.session.execute(
+                update(Transaction)
+                .where(*in_range, column.is_(None), number.in_(select(Account.account_number)))
+                .values({column: account_id})
+            ).rowcount
+        db.session.commit()
+        logger.info(f"Backfilled transaction account ids up to id {min(start + batch_size, last_id)}")
+    return filled
+
+
+@click.command('backfill-transaction-accounts')
+@click.option('--batch-size', type=int, default=BATCH_SIZE, help="Transaction ids per UPDATE and commit.")
+@with_appcontext
+def backfill_transaction_accounts_command(batch_size):
+    """
+    Set the account id references of transactions recorded before they existed.
+    """
+    started = time.perf_counter()
+    filled = transaction_account_ids(batch_size)
+    click.echo(f"Filled {filled} account references in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,178 @@
+import logging
+from datetime import date, datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import BigInteger, delete, func, insert, literal, select, type_coerce, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from iebank_api import db
+from iebank_api.money import Money
+from iebank_api.models import Account, AccountDailyBalance, Transaction, TransactionArchive
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+REBUILD_CHUNK = 10000
+
+
+def upsert(model):
+    """
+    The dialect's INSERT for model, which supports on_conflict_do_update.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upsert not supported on {dialect}")
+
+
+def record(day, changes):
+    """
+    Fold movements into the day's snapshot rows, inside the caller's transaction.
+
+    changes maps account number -> (closing balance, credits, debits, count).
+    Rows are written in account number order, the same order the balance
+    updates lock accounts in, so concurrent movements cannot deadlock here.
+    """
+    for account_number in sorted(changes):
+        closing, credits, debits, count = changes[account_number]
+        statement = upsert(AccountDailyBalance).values(
+            account_number=account_number, day=day, closing_balance=closing,
+            credits=credits, debits=debits, transaction_count=count
+        )
+        table = AccountDailyBalance.__table__
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.account_number, table.c.day],
+            set_={
+                "closing_balance": statement.excluded.closing_balance,
+                "credits": table.c.credits + statement.excluded.credits,
+                "debits": table.c.debits + statement.excluded.debits,
+                "transaction_count": table.c.transaction_count + statement.excluded.transaction_count,
+            }
+        ))
+
+
+def _as_date(value):
+    # SQLite's date() returns text, PostgreSQL's a date
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild(account_numbers=None):
+    """
+    Recompute snapshots from the transaction history, archived included, and
+    current balances, walking each account's days backwards from its live
+    balance. Returns the number of snapshot rows written. One aggregate
+    query, streamed.
+    """
+    zero = literal(0, BigInteger)
+    branches = []
+    for model in (Transaction, TransactionArchive):
+        day = func.date(model.transaction_date).label('day')
+        # Sum raw cents; deposits are recorded with sender == receiver and only credit the account
+        cents = type_coerce(model.amount, BigInteger)
+        credits = select(
+            model.receiver.label('account_number'), day, cents.label('credit'), zero.label('debit')
+        )
+        debits = select(
+            model.sender.label('account_number'), day, zero.label('credit'), cents.label('debit')
+        ).where(model.sender != model.receiver)
+        if account_numbers is not None:
+            credits = credits.where(model.receiver.in_(account_numbers))
+            debits = debits.where(model.sender.in_(account_numbers))
+        branches += [credits, debits]
+    sides = union_all(*branches).subquery()
+    daily = (
+        select(
+            sides.c.account_number, sides.c.day,
+            func.sum(sides.c.credit).label('credits'), func.sum(sides.c.debit).label('debits'),
+            func.count().label('transaction_count')
+        )
+        .group_by(sides.c.account_number, sides.c.day)
+        .order_by(sides.c.account_number, sides.c.day.desc())
+    )
+
+    # Locking the accounts holds off transfers until the rebuilt rows are committed
+    balance_query = select(Account.account_number, Account.balance).with_for_update()
+    if account_numbers is not None:
+        balance_query = balance_query.where(Account.account_number.in_(account_numbers))
+    balances = dict(db.session.execute(balance_query).all())
+
+    clear = delete(AccountDailyBalance)
+    if account_numbers is not None:
+        clear = clear.where(AccountDailyBalance.account_number.in_(account_numbers))
+    db.session.execute(clear)
+
+    written = 0
+    rows = []
+    current, closing = None, None
+    for row in db.session.execute(daily.execution_options(yield_per=REBUILD_CHUNK)):
+        if row.account_number not in balances:
+            # History of a deleted account
+            continue
+        if row.account_number != current:
+            current, closing = row.account_number, balances[row.account_number]
+        credit, debit = Money.from_cents(row.credits or 0), Money.from_cents(row.debits or 0)
+        rows.append({
+            "account_number": current, "day": _as_date(row.day), "closing_balance": closing,
+            "credits": credit, "debits": debit, "transaction_count": row.transaction_count,
+        })
+        closing = closing - credit + debit
+        if len(rows) >= REBUILD_CHUNK:
+            db.session.execute(insert(AccountDailyBalance), rows)
+            written += len(rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(AccountDailyBalance), rows)
+        written += len(rows)
+    db.session.commit()
+    logger.info(f"Rebuilt {written} daily balance snapshots")
+    return written
+
+
+def statement(account_number, start, end):
+    """
+    Opening balance before start, one row per active day between start and
+    end (inclusive dates) and the closing balance, all read from snapshots:
+    the cost depends on the number of days in the range, not on history.
+    """
+    opening = db.session.scalar(
+        select(AccountDailyBalance.closing_balance)
+        .where(AccountDailyBalance.account_number == account_number, AccountDailyBalance.day < start)
+        .order_by(AccountDailyBalance.day.desc()).limit(1)
+    )
+    opening = Money(0) if opening is None else opening
+    days = db.session.execute(
+        select(AccountDailyBalance.day, AccountDailyBalance.credits, AccountDailyBalance.debits,
+               AccountDailyBalance.transaction_count, AccountDailyBalance.closing_balance)
+        .where(AccountDailyBalance.account_number == account_number,
+               AccountDailyBalance.day >= start, AccountDailyBalance.day <= end)
+        .order_by(AccountDailyBalance.day)
+    ).all()
+    return {
+        "account_number": account_number,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "opening_balance": opening,
+        "closing_balance": days[-1].closing_balance if days else opening,
+        "credits": sum((day.credits for day in days), Money(0)),
+        "debits": sum((day.debits for day in days), Money(0)),
+        "days": [{
+            "date": day.day.isoformat(),
+            "credits": day.credits,
+            "debits": day.debits,
+            "transaction_count": day.transaction_count,
+            "closing_balance": day.closing_balance,
+        } for day in days],
+    }
+
+
+@click.command('rebuild-balances')
+@click.option('--account', 'accounts', multiple=True, help="Only rebuild these account numbers.")
+@with_appcontext
+def rebuild_balances_command(accounts):
+    """
+    Recompute the daily balance snapshots from the transaction history.
+    """
+    started = datetime.utcnow()
+    written = rebuild(list(accounts) or None)
+    click.echo(f"Wrote {written} daily balance snapshots in {(datetime.utcnow() - started).total_seconds():.1f}s")
@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+import time
+from sqlalchemy import event
+from iebank_api import db, metrics
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+
+def default_credential():
+    # Imported lazily so environments without Azure AD never load azure-identity
+    from azure.identity import DefaultAzureCredential
+    return DefaultAzureCredential()
+
+
+class TokenCache:
+    """
+    Keeps an Azure AD access token for the database and refreshes it in a
+    background thread refresh_margin seconds before it expires, so opening a
+    pool connection only reads the cached value.
+
+    The first token is fetched in the background as well; a connection that
+    arrives before it (or after a failed refresh let it expire) fetches one
+    inline. The refresher is restarted in forked children (gunicorn).
+    """
+
+    def __init__(self, credential_factory, scope, refresh_margin=300, retry_interval=30):
+        self.credential_factory = credential_factory
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.refreshes = 0
+        self.failures = 0
+        self._credential = None
+        self._token = None
+        self._reset_threading()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_threading)
+
+    def _reset_threading(self):
+        # Locks inherited from the parent may be held by a thread that does not exist here
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-token-refresh", daemon=True)
+                self._thread.start()
+
+    def get(self):
+        """
+        The current token string, fetching one inline only if none is valid.
+        """
+        self.start()
+        token = self._token
+        if token is None or token.expires_on <= time.time():
+            token = self._fetch()
+        return token.token
+
+    def _fetch(self):
+        if self._credential is None:
+            self._credential = self.credential_factory()
+        token = self._credential.get_token(self.scope)
+        self._token = token
+        self.refreshes += 1
+        logger.info(f"Database access token refreshed, expires in {int(token.expires_on - time.time())}s")
+        return token
+
+    def _run(self):
+        while True:
+            token = self._token
+            if token is None:
+                wait = 0
+            else:
+                wait = max(token.expires_on - self.refresh_margin - time.time(), 1.0)
+            time.sleep(wait)
+            try:
+                self._fetch()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Database access token refresh failed: {str(e)}")
+                time.sleep(self.retry_interval)
+
+    def provide_password(self, dialect, conn_rec, cargs, cparams):
+        """
+        SQLAlchemy do_connect hook: use the cached token as the connection password.
+        """
+        cparams['password'] = self.get()
+
+    def stats(self):
+        token = self._token
+        return {
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "expires_in": int(token.expires_on - time.time()) if token else None,
+        }
+
+
+def init_app(app):
+    """
+    Supply database passwords from a refreshing Azure AD token when
+    AZURE_DB_TOKEN_SCOPE is configured. Must run after db.init_app.
+    """
+    scope = app.config.get('AZURE_DB_TOKEN_SCOPE')
+    if not scope:
+        return None
+
+    cache = TokenCache(
+        app.config.get('AZURE_CREDENTIAL_FACTORY') or default_credential,
+        scope,
+        refresh_margin=app.config['AZURE_DB_TOKEN_REFRESH_MARGIN']
+    )
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'do_connect', cache.provide_password)
+    app.extensions['db_token'] = cache
+    metrics.register(app, 'db_token', cache.stats)
+    cache.start()
+    return cache
@@ -0,0 +1,251 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from cachetools import LRUCache
+from flask import Response, current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from iebank_api import db, metrics
+from iebank_api.models import IdempotencyRecord
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 64
+
+
+class StoredResponse:
+    def __init__(self, fingerprint, status_code, body, created_at):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.body = body
+        self.created_at = created_at
+
+
+class IdempotencyStore:
+    """
+    Completed responses by (user id, key): an in-process LRU in front of the
+    idempotency_record table, which is the source of truth shared by all
+    workers. Rows older than ttl seconds are deleted by sweep(), at most
+    sweep_batch at a time and at most once every sweep_interval seconds.
+    """
+
+    def __init__(self, ttl, cache_size, sweep_interval, sweep_batch):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.cache_replays = 0
+        self.db_replays = 0
+        self.conflicts = 0
+        self.swept = 0
+
+    def cutoff(self):
+        return datetime.utcnow() - timedelta(seconds=self.ttl)
+
+    def cached(self, user_id, key):
+        with self._lock:
+            stored = self._cache.get((user_id, key))
+        if stored is not None and stored.created_at < self.cutoff():
+            return None
+        return stored
+
+    def remember(self, user_id, key, stored):
+        with self._lock:
+            self._cache[(user_id, key)] = stored
+
+    def count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def sweep(self, force=False):
+        """
+        Delete one batch of expired records. Cheap enough to piggyback on
+        requests: it runs on the created_at index and is rate limited per process.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_sweep:
+                return 0
+            self._next_sweep = now + self.sweep_interval
+        expired = (
+            select(IdempotencyRecord.id).where(IdempotencyRecord.created_at < self.cutoff())
+            .limit(self.sweep_batch).scalar_subquery()
+        )
+        try:
+            removed = db.session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.id.in_(expired))).rowcount
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error sweeping idempotency records: {str(e)}")
+            return 0
+        if removed:
+            with self._lock:
+                self.swept += removed
+            logger.info(f"Swept {removed} expired idempotency records")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached": len(self._cache),
+                "cache_replays": self.cache_replays,
+                "db_replays": self.db_replays,
+                "conflicts": self.conflicts,
+                "swept": self.swept,
+            }
+
+
+def init_app(app):
+    store = IdempotencyStore(
+        ttl=app.config['IDEMPOTENCY_KEY_TTL'],
+        cache_size=app.config['IDEMPOTENCY_CACHE_SIZE'],
+        sweep_interval=app.config['IDEMPOTENCY_SWEEP_INTERVAL'],
+        sweep_batch=app.config['IDEMPOTENCY_SWEEP_BATCH']
+    )
+    app.extensions['idempotency'] = store
+    metrics.register(app, 'idempotency', store.stats)
+    return store
+
+
+def store():
+    return current_app.extensions['idempotency']
+
+
+def _fingerprint():
+    digest = hashlib.sha256(request.endpoint.encode())
+    digest.update(b'\n')
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return jsonify({"msg": f"{HEADER} was already used for a different request"}), 422
+    response = Response(stored.body, status=stored.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _reserve(user_id, key, fingerprint):
+    """
+    Insert the in-flight record in the request's transaction, so it commits
+    together with the money movement. Returns None once reserved, or the
+    response to send if the key is taken.
+    """
+    records = store()
+    for _ in range(2):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(IdempotencyRecord).values(
+                    user_id=user_id, key=key, fingerprint=fingerprint, created_at=datetime.utcnow()
+                ))
+            return None
+        except IntegrityError:
+            existing = db.session.execute(
+                select(IdempotencyRecord.fingerprint, IdempotencyRecord.status_code,
+                       IdempotencyRecord.response_body, IdempotencyRecord.created_at)
+                .where(IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key)
+            ).first()
+        if existing is not None and existing.created_at < records.cutoff():
+            # Expired but not swept yet: the key is free again
+            db.session.execute(delete(IdempotencyRecord).where(
+                IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key
+            ))
+            continue
+        if existing is None or existing.status_code is None:
+            records.count('conflicts')
+            db.session.rollback()
+            return jsonify({"msg": f"A request with this {HEADER} is still being processed"}), 409
+        stored = StoredResponse(*existing)
+        records.remember(user_id, key, stored)
+        records.count('db_replays')
+        db.session.rollback()
+        return _replay(stored, fingerprint)
+    db.session.rollback()
+    return jsonify({"msg": f"A request with this {HEADER} is still being processed"}), 409
+
+
+def _complete(user_id, key, fingerprint, response):
+    records = store()
+    if response.status_code >= 500:
+        # Nothing was applied; let the client retry with the same key
+        db.session.rollback()
+        db.session.execute(delete(IdempotencyRecord).where(
+            IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key,
+            IdempotencyRecord.status_code.is_(None)
+        ))
+        db.session.commit()
+        return
+    stored = StoredResponse(fingerprint, response.status_code, response.get_data(as_text=True), datetime.utcnow())
+    try:
+        completed = db.session.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.user_id == user_id, IdempotencyRecord.key == key)
+            .values(status_code=stored.status_code, response_body=stored.body)
+        ).rowcount
+        if not completed:
+            # A refusal rolled back the transaction and the reservation with it
+            db.session.execute(insert(IdempotencyRecord).values(
+                user_id=user_id, key=key, fingerprint=fingerprint, status_code=stored.status_code,
+                response_body=stored.body, created_at=stored.created_at
+            ))
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent retry recorded the same refusal first
+        db.session.rollback()
+        return
+    records.remember(user_id, key, stored)
+    records.sweep()
+
+
+def idempotent(view):
+    """
+    Make a money-moving endpoint safe to retry. Requests carrying an
+    Idempotency-Key run once per user and key; later requests with the
+    same key get the first response back (with Idempotent-Replayed: true)
+    until IDEMPOTENCY_KEY_TTL expires, and a retry racing the original gets
+    409. Server errors are not stored, so they can be retried.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"msg": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}), 400
+
+        user_id = get_jwt_identity().get("id")
+        fingerprint = _fingerprint()
+        stored = store().cached(user_id, key)
+        if stored is not None:
+            store().count('cache_replays')
+            return _replay(stored, fingerprint)
+
+        try:
+            refused = _reserve(user_id, key, fingerprint)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error reserving idempotency key: {str(e)}")
+            return jsonify({"error": "An error occurred"}), 500
+        if refused is not None:
+            logger.info(f"Replayed or refused request with {HEADER} {key} for user {user_id}")
+            return refused
+
+        response = make_response(view(*args, **kwargs))
+        try:
+            _complete(user_id, key, fingerprint, response)
+        except Exception as e:
+            # The reservation committed with the movement, so retries get 409
+            # until the key expires rather than moving money again
+            db.session.rollback()
+            logger.error(f"Error storing idempotent response: {str(e)}")
+        return response
+    return wrapper
@@ -0,0 +1,188 @@
+import csv
+import json
+import logging
+import os
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from iebank_api import account_numbers, db, passwords, ratelimit
+from iebank_api.models import Account, User
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'ndjson')
+DEFAULT_COUNTRY = "No Country Selected"
+# Only the first errors are reported back; the count covers all of them
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, msg):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "msg": msg})
+
+    def to_json(self):
+        return {"imported": self.imported, "skipped": self.skipped, "failed": self.failed, "errors": self.errors}
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line number, row dict or None, error or None) from a text stream
+    of CSV (with a header row) or newline-delimited JSON, one row at a time.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, row, None
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ['true', '1', 't', 'yes']
+    return bool(value)
+
+
+def _prepare(row):
+    """
+    Validate one input row. Accepts either a plain "password" (checked and
+    hashed like register does) or an existing Werkzeug "password_hash",
+    which is stored as-is and upgraded on the user's next login.
+    """
+    username = str(row.get("username") or "").strip()
+    if not username or len(username) > 80:
+        raise ValueError("Username missing or longer than 80 characters")
+    country = str(row.get("country") or "").strip()
+    if len(country) > 15:
+        raise ValueError("Country longer than 15 characters")
+
+    prepared = {"username": username, "is_admin": _flag(row.get("is_admin")), "country": country or DEFAULT_COUNTRY}
+    if row.get("password_hash"):
+        if '$' not in str(row["password_hash"]):
+            raise ValueError("password_hash is not a Werkzeug password hash")
+        prepared["password_hash"] = str(row["password_hash"])
+    elif row.get("password"):
+        weakness = passwords.weakness(str(row["password"]))
+        if weakness:
+            raise ValueError(weakness)
+        prepared["password"] = str(row["password"])
+    else:
+        raise ValueError("Either password or password_hash is required")
+    return prepared
+
+
+def _insert_chunk(chunk, result):
+    """
+    Insert one chunk of prepared rows: one INSERT ... RETURNING for the users,
+    one executemany INSERT for their default accounts, one commit. Usernames
+    that already exist are skipped.
+    """
+    unique = {}
+    for line, row in chunk:
+        if row["username"] in unique:
+            result.error(line, "Duplicate username in import")
+        else:
+            unique[row["username"]] = row
+
+    plain = [row for row in unique.values() if "password" in row]
+    for row, password_hash in zip(plain, passwords.hasher().hash_many([row.pop("password") for row in plain])):
+        row["password_hash"] = password_hash
+
+    for attempt in range(1, account_numbers.MAX_ATTEMPTS + 1):
+        existing = set(db.session.scalars(select(User.username).where(User.username.in_(list(unique)))))
+        rows = [row for username, row in unique.items() if username not in existing]
+        if not rows:
+            break
+        try:
+            with db.session.begin_nested():
+                user_ids = db.session.scalars(
+                    insert(User).returning(User.id, sort_by_parameter_order=True),
+                    [{"username": row["username"], "password_hash": row["password_hash"], "is_admin": row["is_admin"]}
+                     for row in rows]
+                ).all()
+                db.session.execute(insert(Account), [{
+                    "name": f"{row['username']}'s Account",
+                    "account_number": account_numbers.generate(),
+                    "currency": "€",
+                    "country": row["country"],
+                    "user_id": user_id,
+                } for row, user_id in zip(rows, user_ids)])
+            break
+        except IntegrityError:
+            # A concurrent registration took a username or account number; re-read and retry
+            if attempt == account_numbers.MAX_ATTEMPTS:
+                raise
+            logger.warning("Conflict while importing users, retrying chunk")
+
+    db.session.commit()
+    ratelimit.forget_unknown(*unique)
+    result.imported += len(rows)
+    result.skipped += len(unique) - len(rows)
+
+
+def import_users(rows, chunk_size=None):
+    """
+    Create users, each with a default account, from read_rows() output in
+    chunks of chunk_size (IMPORT_CHUNK_SIZE). Invalid rows are reported and
+    skipped; every chunk is committed on its own.
+    """
+    chunk_size = chunk_size or current_app.config['IMPORT_CHUNK_SIZE']
+    result = ImportResult()
+    chunk = []
+    for line, row, error in rows:
+        if error is None:
+            try:
+                chunk.append((line, _prepare(row)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            result.error(line, error)
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, result)
+            chunk = []
+    if chunk:
+        _insert_chunk(chunk, result)
+    logger.info(f"Imported {result.imported} users, skipped {result.skipped} existing, {result.failed} failed")
+    return result
+
+
+@click.command('import-users')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help="Defaults to csv for .csv files, ndjson otherwise.")
+@click.option('--chunk-size', type=int, default=None, help="Rows per INSERT and commit.")
+@with_appcontext
+def import_users_command(source, fmt, chunk_size):
+    """
+    Create users and their default accounts from a CSV or NDJSON file ("-" for stdin).
+    """
+    fmt = fmt or ('csv' if os.path.splitext(source.name)[1].lower() == '.csv' else 'ndjson')
+    started = time.perf_counter()
+    result = import_users(read_rows(source, fmt), chunk_size)
+    click.echo(f"Imported {result.imported} users ({result.skipped} already existed, {result.failed} failed) "
+               f"in {time.perf_counter() - started:.1f}s")
+    for error in result.errors:
+        click.echo(f"  line {error['line']}: {error['msg']}")
@@ -0,0 +1,203 @@
+import logging
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import BigInteger, func, insert, or_, select, type_coerce
+from iebank_api import db
+from iebank_api.balances import upsert
+from iebank_api.money import Money
+from iebank_api.models import Account, LedgerCheckpoint, LedgerEntry
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+# Counterparty of deposits: money entering the bank from outside
+EXTERNAL = "EXTERNAL"
+# Only the first problems are reported back; the counts cover all of them
+MAX_REPORTED = 100
+VERIFY_CHUNK = 10000
+
+
+def postings(transaction_id, sender, receiver, amount, created_at):
+    """
+    The two entries of one movement: debit the payer, credit the payee.
+    Deposits (sender == receiver) are paid by EXTERNAL.
+    """
+    payer = EXTERNAL if sender == receiver else sender
+    return [
+        {"transaction_id": transaction_id, "account_number": payer, "amount": -amount, "created_at": created_at},
+        {"transaction_id": transaction_id, "account_number": receiver, "amount": amount, "created_at": created_at},
+    ]
+
+
+def post(entries):
+    """
+    Append entries in the caller's transaction, as one executemany INSERT.
+    """
+    db.session.execute(insert(LedgerEntry), entries)
+
+
+def _cents(column):
+    # Sum raw cents so the database adds integers, not Money values
+    return type_coerce(column, BigInteger)
+
+
+def high_water_mark():
+    """
+    The last entry folded into the checkpoints, 0 before the first one.
+    """
+    return db.session.scalar(select(func.coalesce(func.max(LedgerCheckpoint.seq), 0)))
+
+
+def _tail_cents():
+    """
+    Correlated sum of an account's entries after its checkpoint: one range
+    scan of (account_number, id) per account, however long the history.
+    """
+    return (
+        select(func.sum(_cents(LedgerEntry.amount)))
+        .where(LedgerEntry.account_number == Account.account_number,
+               LedgerEntry.id > func.coalesce(LedgerCheckpoint.seq, 0))
+        .scalar_subquery()
+    )
+
+
+def ledger_balance(account_number):
+    checkpoint = db.session.get(LedgerCheckpoint, account_number)
+    tail = db.session.scalar(
+        select(func.sum(_cents(LedgerEntry.amount)))
+        .where(LedgerEntry.account_number == account_number,
+               LedgerEntry.id > (checkpoint.seq if checkpoint else 0))
+    )
+    return (checkpoint.balance if checkpoint else Money(0)) + Money.from_cents(tail or 0)
+
+
+class VerifyResult:
+    def __init__(self):
+        self.accounts = 0
+        self.mismatched = 0
+        self.unbalanced = 0
+        self.mismatches = []
+        self.unbalanced_transactions = []
+
+    @property
+    def ok(self):
+        return not self.mismatched and not self.unbalanced
+
+    def to_json(self):
+        return {
+            "accounts": self.accounts,
+            "mismatched": self.mismatched,
+            "unbalanced": self.unbalanced,
+            "mismatches": self.mismatches,
+            "unbalanced_transactions": self.unbalanced_transactions,
+        }
+
+
+def verify():
+    """
+    Reconcile every account's balance with its ledger balance in one
+    streamed query, and check that every transaction posted since the last
+    checkpoint has exactly two entries summing to zero. Reads only entries
+    after the checkpoints.
+    """
+    result = VerifyResult()
+    query = (
+        select(Account.account_number, _cents(Account.balance).label('balance'),
+                _cents(LedgerCheckpoint.balance).label('checkpoint'), _tail_cents().label('tail'))
+        .outerjoin(LedgerCheckpoint, LedgerCheckpoint.account_number == Account.account_number)
+        .order_by(Account.account_number)
+    )
+    # A single statement, so balances and entries are read from one snapshot
+    for account_number, balance, checkpoint, tail in db.session.execute(
+            query.execution_options(stream_results=True, yield_per=VERIFY_CHUNK)):
+        result.accounts += 1
+        expected = (checkpoint or 0) + (tail or 0)
+        if balance != expected:
+            result.mismatched += 1
+            if len(result.mismatches) < MAX_REPORTED:
+                result.mismatches.append({
+                    "account_number": account_number,
+                    "balance": Money.from_cents(balance),
+                    "ledger_balance": Money.from_cents(expected),
+                })
+
+    unbalanced = db.session.execute(
+        select(LedgerEntry.transaction_id)
+        .where(LedgerEntry.id > high_water_mark(), LedgerEntry.transaction_id.is_not(None))
+        .group_by(LedgerEntry.transaction_id)
+        .having(or_(func.sum(_cents(LedgerEntry.amount)) != 0, func.count() != 2))
+        .order_by(LedgerEntry.transaction_id)
+        .execution_options(stream_results=True, yield_per=VERIFY_CHUNK)
+    )
+    for (transaction_id,) in unbalanced:
+        result.unbalanced += 1
+        if len(result.unbalanced_transactions) < MAX_REPORTED:
+            result.unbalanced_transactions.append(transaction_id)
+    db.session.rollback()
+    return result
+
+
+def checkpoint(lag=None):
+    """
+    Fold the entries posted since the last checkpoint into the per-account
+    checkpoint balances and advance the high-water mark. Entries younger
+    than lag seconds (LEDGER_CHECKPOINT_LAG) are left for the next run: a
+    transaction still in flight may hold a lower id than a committed one.
+    Returns (new high-water mark, accounts updated).
+    """
+    lag = current_app.config['LEDGER_CHECKPOINT_LAG'] if lag is None else lag
+    previous = high_water_mark()
+    target = db.session.scalar(
+        select(func.max(LedgerEntry.id))
+        .where(LedgerEntry.id > previous, LedgerEntry.created_at <= datetime.utcnow() - timedelta(seconds=lag))
+    )
+    if target is None:
+        return previous, 0
+
+    sums = db.session.execute(
+        select(LedgerEntry.account_number, func.sum(_cents(LedgerEntry.amount)))
+        .where(LedgerEntry.id > previous, LedgerEntry.id <= target)
+        .group_by(LedgerEntry.account_number)
+    ).all()
+    table = LedgerCheckpoint.__table__
+    statement = upsert(LedgerCheckpoint)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.account_number],
+            set_={"balance": table.c.balance + statement.excluded.balance, "seq": statement.excluded.seq}
+        ),
+        [{"account_number": account_number, "balance": Money.from_cents(cents), "seq": target}
+         for account_number, cents in sums]
+    )
+    db.session.commit()
+    logger.info(f"Ledger checkpoint advanced from {previous} to {target} for {len(sums)} accounts")
+    return target, len(sums)
+
+
+@click.command('verify-ledger')
+@click.option('--checkpoint', 'advance', is_flag=True, help="Advance the checkpoint after verifying.")
+@with_appcontext
+def verify_ledger_command(advance):
+    """
+    Reconcile account balances with the ledger since the last checkpoint.
+    """
+    started = time.perf_counter()
+    result = verify()
+    click.echo(f"Verified {result.accounts} accounts in {time.perf_counter() - started:.1f}s: "
+               f"{result.mismatched} balance mismatches, {result.unbalanced} unbalanced transactions")
+    for mismatch in result.mismatches:
+        click.echo(f"  account {mismatch['account_number']}: balance {mismatch['balance']}, "
+                   f"ledger {mismatch['ledger_balance']}")
+    for transaction_id in result.unbalanced_transactions:
+        click.echo(f"  transaction {transaction_id} does not balance")
+    if not result.ok:
+        # Never fold unreconciled entries past the high-water mark
+        if advance:
+            click.echo("Checkpoint not advanced")
+        raise SystemExit(1)
+    if advance:
+        seq, accounts = checkpoint()
+        click.echo(f"Checkpoint at entry {seq} ({accounts} accounts updated)")
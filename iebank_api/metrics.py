@@ -0,0 +1,85 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that also records how long requests wait for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+                self.timeouts += timed_out
+
+
+def pool_stats(engine):
+    """
+    Point-in-time usage of an engine's connection pool.
+    """
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            # overflow() starts at -size; only connections beyond the pool count
+            "overflow_in_use": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            stats.update({
+                "checkouts": pool.waits,
+                "wait_ms_avg": round(pool.wait_seconds_total / pool.waits * 1000, 3) if pool.waits else 0.0,
+                "wait_ms_max": round(pool.wait_seconds_max * 1000, 3),
+                "timeouts": pool.timeouts,
+            })
+    return stats
+
+
+def init_app(app):
+    """
+    Use TimedQueuePool whenever the app configures a sized connection pool.
+    Must run before db.init_app creates the engines.
+    """
+    app.extensions['metrics'] = {}
+    # Copy, the options dict may be shared with the config class
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'pool_size' in options:
+        options.setdefault('poolclass', TimedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def register(app, name, collect):
+    """
+    Expose collect() (returning a JSON-able dict) under name in /api/metrics.
+    """
+    app.extensions['metrics'][name] = collect
+
+
+def collect(app):
+    return {name: source() for name, source in app.extensions['metrics'].items()}
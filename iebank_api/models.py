@@ -1,25 +1,40 @@
 from datetime import datetime
-import string, random
 from iebank_api import db
+from iebank_api.account_numbers import generate as generate_account_number
 from datetime import datetime
-import string, random
 from iebank_api import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from iebank_api.money import Money, MoneyType
+from iebank_api.passwords import hash_password
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+from werkzeug.security import check_password_hash
 import logging
 
 # Initialize logger for this module
 logger = logging.getLogger("hello")
 
+# Status of deleted accounts: kept for their history, refused for new movements
+ACCOUNT_CLOSED = "Closed"
+
 # Account Model
 class Account(db.Model):
+    # An owner's accounts in id order: keyset pages and the ETag aggregate.
+    # version is left out so balance updates do not touch a secondary index
+    __table_args__ = (
+        db.Index('ix_account_user', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(32), nullable=False)
     account_number = db.Column(db.String(20), nullable=False, unique=True)
-    balance = db.Column(db.Float, nullable=False, default=0.0)
+    # Stored as integer cents, exposed as Money
+    balance = db.Column(MoneyType, nullable=False, default=Money(0))
     currency = db.Column(db.String(1), nullable=False, default="€")
     status = db.Column(db.String(10), nullable=False, default="Active")
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     country = db.Column(db.String(15), nullable=False, default="No Country Selected")
+    # Bumped by every write to the row; listings derive their ETags from it
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     # Add the foreign key to link the account to a user
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # Foreign key
@@ -29,14 +44,21 @@ class Account(db.Model):
 
     def __init__(self, name, currency, country):
         self.name = name
-        self.account_number = ''.join(random.choices(string.digits, k=20))
+        self.account_number = generate_account_number()
         self.currency = currency
-        self.balance = 0.0
+        self.balance = Money(0)
         self.status = "Active"
         self.country = country
         logger.info(f"Account initialized for user: {self.name} with account number {self.account_number}")
 
 
+@event.listens_for(Account, 'before_update')
+def _bump_version(mapper, connection, target):
+    # Core UPDATEs (balance changes) bump version themselves
+    if object_session(target).is_modified(target, include_collections=False):
+        target.version = Account.version + 1
+
+
 # User Model for Authentication
 class User(db.Model):
     __tablename__ = 'users'
@@ -51,10 +73,10 @@ class User(db.Model):
 
     def set_password(self, password):
         """
-        Hash and set the password for the user.
+        Hash and set the password for the user using the configured PASSWORD_HASH_METHOD.
         """
         try:
-            self.password_hash = generate_password_hash(password)
+            self.password_hash = hash_password(password)
             logger.info(f"Password set for user: {self.username}")
         except Exception as e:
             logger.error(f"Error setting password for user {self.username}: {str(e)}")
@@ -79,10 +101,22 @@ class User(db.Model):
         return f'<User {self.username}>'
 
 class Transaction(db.Model):
+    # History lookups filter on one side of the transfer and read newest first
+    __table_args__ = (
+        db.Index('ix_transaction_sender_account_date', 'sender_account_id', 'transaction_date'),
+        db.Index('ix_transaction_receiver_account_date', 'receiver_account_id', 'transaction_date'),
+        # Daily volume for the admin dashboard scans a date range across all accounts
+        db.Index('ix_transaction_date', 'transaction_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     sender = db.Column(db.String(20), nullable=False)
     receiver = db.Column(db.String(20), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    # History lookups filter on these; deleting an account sets them to NULL
+    # while sender and receiver keep its number
+    sender_account_id = db.Column(db.Integer, db.ForeignKey('account.id', ondelete='SET NULL'), nullable=True)
+    receiver_account_id = db.Column(db.Integer, db.ForeignKey('account.id', ondelete='SET NULL'), nullable=True)
+    amount = db.Column(MoneyType, nullable=False)
     transaction_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     def __repr__(self):
@@ -91,15 +125,128 @@ class Transaction(db.Model):
     def __init__(self, sender, receiver, amount):
         self.sender = sender
         self.receiver = receiver
-        self.amount = amount
+        self.amount = Money(amount)
         logger.info(f"Transaction initialized from {self.sender} to {self.receiver} for {self.amount}")
     
 
 
+class TransactionArchive(db.Model):
+    """
+    Transactions older than ARCHIVE_AFTER_DAYS, moved out of the hot
+    transaction table by the archival job with their ids unchanged. Only
+    read when a caller asks for archived history.
+    """
+    __tablename__ = 'transaction_archive'
+    __table_args__ = (
+        db.Index('ix_transaction_archive_sender_account_date', 'sender_account_id', 'transaction_date'),
+        db.Index('ix_transaction_archive_receiver_account_date', 'receiver_account_id', 'transaction_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    sender = db.Column(db.String(20), nullable=False)
+    receiver = db.Column(db.String(20), nullable=False)
+    sender_account_id = db.Column(db.Integer, nullable=True)
+    receiver_account_id = db.Column(db.Integer, nullable=True)
+    amount = db.Column(MoneyType, nullable=False)
+    transaction_date = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<TransactionArchive {self.id}>'
+
+
+class AccountDailyBalance(db.Model):
+    """
+    One row per account and day with activity: the balance at the end of the
+    day and that day's totals. Maintained by the transfers service in the
+    same transaction as the movement.
+    """
+    __tablename__ = 'account_daily_balance'
+
+    account_number = db.Column(db.String(20), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    closing_balance = db.Column(MoneyType, nullable=False)
+    credits = db.Column(MoneyType, nullable=False, default=Money(0))
+    debits = db.Column(MoneyType, nullable=False, default=Money(0))
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AccountDailyBalance {self.account_number} {self.day}>'
+
+
+class LedgerEntry(db.Model):
+    """
+    One side of a money movement. Every movement appends a debit (negative
+    amount) on the paying account and a credit on the receiving one, so each
+    transaction's entries sum to zero; deposits are paid by the EXTERNAL
+    account. Rows are only ever appended, and id order is posting order.
+    """
+    __tablename__ = 'ledger_entry'
+    __table_args__ = (
+        # Per-account scans from a checkpoint onwards
+        db.Index('ix_ledger_entry_account_id', 'account_number', 'id'),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    # None for the opening entries of balances that predate the ledger
+    transaction_id = db.Column(db.Integer, nullable=True)
+    account_number = db.Column(db.String(20), nullable=False)
+    amount = db.Column(MoneyType, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<LedgerEntry {self.id} {self.account_number} {self.amount}>'
+
+
+@event.listens_for(LedgerEntry, 'before_update')
+@event.listens_for(LedgerEntry, 'before_delete')
+def _ledger_is_append_only(mapper, connection, target):
+    raise ValueError("Ledger entries cannot be changed; post a correcting entry instead")
+
+
+class LedgerCheckpoint(db.Model):
+    """
+    An account's balance as derived from every ledger entry up to seq.
+    The ledger balance is this plus the entries after seq, so verification
+    only reads what was posted since the last checkpoint.
+    """
+    __tablename__ = 'ledger_checkpoint'
+
+    account_number = db.Column(db.String(20), primary_key=True)
+    balance = db.Column(MoneyType, nullable=False)
+    seq = db.Column(db.BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f'<LedgerCheckpoint {self.account_number} {self.seq}>'
+
+
+class IdempotencyRecord(db.Model):
+    """
+    The stored outcome of a request sent with an Idempotency-Key, so retries
+    of a transfer or deposit are answered without moving money again. A row
+    without status_code is a request still in flight.
+    """
+    __tablename__ = 'idempotency_record'
+    __table_args__ = (
+        db.Index('uq_idempotency_record_user_key', 'user_id', 'key', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    key = db.Column(db.String(64), nullable=False)
+    # SHA-256 of the endpoint and request body; a reused key must replay the same request
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyRecord {self.user_id} {self.key}>'
+
+
 # Initialize the SQLAlchemy object
 def init_db(app):
     """Initialize the database with the app context."""
     db.init_app(app)
     with app.app_context():
         db.create_all()  # Creates tables for all defined models
-        logger.info("Database initialized and all tables created.")
\ No newline at end of file
+        logger.info("Database initialized and all tables created.")
@@ -0,0 +1,84 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from sqlalchemy.types import BigInteger, TypeDecorator
+
+CENT = Decimal('0.01')
+
+
+class Money(Decimal):
+    """
+    Exact monetary amount in major units, always quantized to whole cents.
+
+    Adding or subtracting Money keeps the Money type; mixing it with a float
+    raises TypeError like Decimal does, so float drift cannot creep back in.
+    """
+
+    def __new__(cls, value=0):
+        if isinstance(value, float):
+            # repr() gives the shortest decimal that round-trips, e.g. 0.1 -> '0.1'
+            value = repr(value)
+        return super().__new__(cls, Decimal(value).quantize(CENT, rounding=ROUND_HALF_EVEN))
+
+    @classmethod
+    def from_cents(cls, cents):
+        # Already exactly two decimal places, so skip the quantize in __new__
+        return Decimal.__new__(cls, Decimal(int(cents)).scaleb(-2))
+
+    @property
+    def cents(self):
+        return int(self.scaleb(2))
+
+    def _wrap(self, result):
+        return result if result is NotImplemented else Money(result)
+
+    def __add__(self, other):
+        return self._wrap(Decimal.__add__(self, other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._wrap(Decimal.__sub__(self, other))
+
+    def __rsub__(self, other):
+        return self._wrap(Decimal.__rsub__(self, other))
+
+    def __neg__(self):
+        return Money(Decimal.__neg__(self))
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+def parse_amount(value):
+    """
+    Turn a JSON amount into Money, or None if it is not a finite number of whole cents.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        return None
+    try:
+        amount = Money(value)
+    except (InvalidOperation, ValueError):
+        return None
+    if amount != Decimal(repr(value) if isinstance(value, float) else value):
+        # Sub-cent precision is rejected rather than silently rounded
+        return None
+    return amount
+
+
+class MoneyType(TypeDecorator):
+    """
+    Store Money as a BIGINT count of cents so SQL sums and comparisons are exact.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, Money):
+            value = Money(value)
+        return value.cents
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Money.from_cents(value)
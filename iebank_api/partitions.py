@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from datetime import date, datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from iebank_api import db
+from iebank_api.models import Transaction
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+PARENT = 'transaction'
+# Created by the migration; catches rows outside every monthly partition
+DEFAULT_PARTITION = 'transaction_default'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def monthly_ranges(first, last):
+    """
+    (partition name, from, to) for every month from first's to last's
+    inclusive; bounds are half-open, as Postgres range partitions are.
+    """
+    month, last = month_start(first), month_start(last)
+    while month <= last:
+        yield f"{PARENT}_y{month.year}m{month.month:02d}", month, next_month(month)
+        month = next_month(month)
+
+
+def is_partitioned():
+    """
+    True when the transaction table is a partitioned Postgres table; the
+    SQLite databases used locally and in CI keep a single table.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return False
+    return bool(db.session.scalar(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :parent AND pg_table_is_visible(c.oid)"
+    ), {"parent": PARENT}))
+
+
+def _create_partition(name, start, end):
+    """
+    Create one monthly partition in the current transaction. Rows of that
+    month already sitting in the default partition (the job missed the
+    month) would make the plain CREATE fail its check against the default
+    partition, so it is detached first, the month created, its rows moved
+    across and the default reattached. The parent stays locked meanwhile,
+    so concurrent inserts wait instead of failing.
+    """
+    bounds = {"start": start, "end": end}
+    in_month = "transaction_date >= :start AND transaction_date < :end"
+    bound_clause = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    stray = db.session.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})"), bounds)
+    if not stray:
+        db.session.execute(text(f'CREATE TABLE {name} PARTITION OF "{PARENT}" {bound_clause}'))
+        return
+    columns = ', '.join(column.name for column in Transaction.__table__.columns)
+    db.session.execute(text(f'ALTER TABLE "{PARENT}" DETACH PARTITION {DEFAULT_PARTITION}'))
+    db.session.execute(text(f'CREATE TABLE {name} PARTITION OF "{PARENT}" {bound_clause}'))
+    moved = db.session.execute(text(
+        f'INSERT INTO "{PARENT}" ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} WHERE {in_month}'
+    ), bounds).rowcount
+    db.session.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"), bounds)
+    db.session.execute(text(f'ALTER TABLE "{PARENT}" ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT'))
+    logger.warning(f"Moved {moved} transactions from {DEFAULT_PARTITION} into {name}")
+
+
+def _stray_months():
+    """
+    Months with rows in the default partition: runs were missed for them.
+    The default partition is normally empty, so this scan is cheap.
+    """
+    return [month.date() for month in db.session.scalars(text(
+        f"SELECT DISTINCT date_trunc('month', transaction_date) FROM {DEFAULT_PARTITION}"
+    ))]
+
+
+def ensure_partitions(months_ahead=None, today=None):
+    """
+    Create the monthly partitions that do not exist yet, from the current
+    month to months_ahead (TRANSACTION_PARTITIONS_AHEAD) months ahead, plus
+    any month, past ones included, whose rows ended up in the default
+    partition; those rows are moved into it. Returns the names created.
+    Each partition commits on its own, so one failure does not hold back
+    the others.
+    """
+    if not is_partitioned():
+        return []
+    months_ahead = current_app.config['TRANSACTION_PARTITIONS_AHEAD'] if months_ahead is None else months_ahead
+    today = today or datetime.utcnow().date()
+    last = month_start(today)
+    for _ in range(months_ahead):
+        last = next_month(last)
+
+    months = {month[0]: month for month in monthly_ranges(today, last)}
+    for stray in _stray_months():
+        months.update((month[0], month) for month in monthly_ranges(stray, stray))
+
+    created = []
+    for name, start, end in sorted(months.values(), key=lambda month: month[1]):
+        if db.session.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+            continue
+        try:
+            _create_partition(name, start, end)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error creating transaction partition {name}: {str(e)}")
+            continue
+        created.append(name)
+    if created:
+        logger.info(f"Created transaction partitions {', '.join(created)}")
+    return created
+
+
+def start_maintenance(app, interval=None):
+    """
+    Run ensure_partitions every interval seconds (TRANSACTION_PARTITIONS_INTERVAL)
+    in a daemon thread. gunicorn.conf.py starts it once per container, in
+    the master; the container runs the command itself before gunicorn starts,
+    so the first pass here waits a full interval.
+    """
+    interval = interval or app.config['TRANSACTION_PARTITIONS_INTERVAL']
+
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    ensure_partitions()
+                except Exception as e:
+                    logger.error(f"Error maintaining transaction partitions: {str(e)}")
+
+    thread = threading.Thread(target=run, name="transaction-partitions", daemon=True)
+    thread.start()
+    return thread
+
+
+@click.command('create-transaction-partitions')
+@click.option('--months', type=int, default=None, help="Months ahead of the current one to cover.")
+@with_appcontext
+def create_transaction_partitions_command(months):
+    """
+    Create upcoming monthly partitions of the transaction table (Postgres only).
+    """
+    if not is_partitioned():
+        click.echo("The transaction table is not partitioned on this database; nothing to do")
+        return
+    created = ensure_partitions(months)
+    click.echo(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
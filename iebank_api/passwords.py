@@ -0,0 +1,193 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app, has_app_context
+from sqlalchemy import update
+from werkzeug.security import check_password_hash, generate_password_hash
+from iebank_api import db, metrics
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class HasherBusy(Exception):
+    """
+    Raised when the hashing pool is at capacity and the caller should retry later.
+    """
+
+
+@lru_cache(maxsize=None)
+def _policy(method):
+    # Werkzeug fills in defaults ("pbkdf2" -> "pbkdf2:sha256:1000000"); hash
+    # once to learn the exact prefix stored hashes will carry
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def current_method():
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    return DEFAULT_METHOD
+
+
+def hash_password(password, method=None):
+    return generate_password_hash(password, method or current_method())
+
+
+def needs_rehash(password_hash, method=None):
+    """
+    True if password_hash was made with a different algorithm or cost than
+    the configured policy.
+    """
+    return password_hash.split('$', 1)[0] != _policy(method or current_method())
+
+
+def weakness(password):
+    """
+    Why password is not acceptable for a new account, or None if it is.
+    """
+    if len(password) < 8:
+        return "Password must be at least 8 characters long"
+    if not any(char.isdigit() for char in password) or not any(char.isupper() for char in password):
+        return "Password must contain at least one uppercase letter and one number"
+    return None
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small, bounded thread pool so a burst of
+    logins cannot occupy every request thread with key stretching.
+
+    At most workers hashes run at once and at most queue_size more wait;
+    beyond that submit() raises HasherBusy instead of queueing. hashlib
+    releases the GIL while stretching, so the workers run in parallel.
+    Bulk imports hold at most bulk_slots of those slots, leaving the rest
+    to logins and registrations.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=2, queue_size=32, bulk_slots=1):
+        self.method = method
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._bulk_slots = threading.BoundedSemaphore(bulk_slots)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.rejected = 0
+        self.rehashed = 0
+
+    def submit(self, fn, *args, block=False):
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self._pending.discard(future)
+
+    def hash(self, password):
+        return self.submit(generate_password_hash, password, self.method).result()
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch (bulk import), waiting for free slots instead of failing.
+        At most bulk_slots of its hashes are in flight at once.
+        """
+        futures = []
+        for password in passwords:
+            self._bulk_slots.acquire()
+            try:
+                future = self.submit(generate_password_hash, password, self.method, block=True)
+            except Exception:
+                self._bulk_slots.release()
+                raise
+            future.add_done_callback(lambda _: self._bulk_slots.release())
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def verify(self, password_hash, password):
+        return self.submit(check_password_hash, password_hash, password).result()
+
+    def verify_user(self, user, password):
+        """
+        Check password against user's stored hash on the pool. On success, if
+        the hash predates the current policy, queue an upgrade and return
+        without waiting for it.
+        """
+        if not self.verify(user.password_hash, password):
+            return False
+        if needs_rehash(user.password_hash, self.method):
+            try:
+                self.submit(self._rehash, current_app._get_current_object(), user.id, user.password_hash, password)
+            except HasherBusy:
+                logger.info(f"Hashing pool busy, rehash for user {user.username} deferred")
+        return True
+
+    def _rehash(self, app, user_id, old_hash, password):
+        from iebank_api.models import User
+        new_hash = generate_password_hash(password, self.method)
+        with app.app_context():
+            try:
+                # Only replace the hash we verified; a concurrent password change wins
+                result = db.session.execute(
+                    update(User).where(User.id == user_id, User.password_hash == old_hash)
+                    .values(password_hash=new_hash)
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error upgrading password hash for user {user_id}: {str(e)}")
+                return
+        if result.rowcount:
+            with self._lock:
+                self.rehashed += 1
+            logger.info(f"Password hash for user {user_id} upgraded to {self.method.split(':', 1)[0]}")
+
+    def wait(self):
+        """
+        Block until every submitted job has finished (tests, shutdown).
+        """
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            for future in pending:
+                future.exception()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "method": self.method.split(':', 1)[0],
+                "in_flight": len(self._pending),
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+            }
+
+
+def init_app(app):
+    hasher = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE'],
+        bulk_slots=app.config['PASSWORD_HASH_BULK_SLOTS']
+    )
+    app.extensions['password_hasher'] = hasher
+    metrics.register(app, 'password_hashing', hasher.stats)
+    return hasher
+
+
+def hasher():
+    return current_app.extensions['password_hasher']
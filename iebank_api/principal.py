@@ -0,0 +1,164 @@
+import threading
+from collections import namedtuple
+from cachetools import TTLCache
+from flask import current_app, g, has_app_context
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from iebank_api import db
+from iebank_api.models import Account, User
+
+Principal = namedtuple('Principal', ['id', 'username', 'is_admin', 'account_numbers', 'account_ids'])
+
+
+class PrincipalCache:
+    """
+    Bounded, thread-safe TTL cache of Principals keyed by user id.
+
+    Entries are dropped as soon as a commit touches the user's accounts; the
+    TTL only bounds staleness against writes made by other worker processes.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            return self._entries.get(user_id)
+
+    def put(self, principal):
+        with self._lock:
+            self._entries[principal.id] = principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_app(app):
+    app.extensions['principal_cache'] = PrincipalCache(
+        maxsize=app.config['PRINCIPAL_CACHE_SIZE'],
+        ttl=app.config['PRINCIPAL_CACHE_TTL']
+    )
+
+
+def _cache():
+    return current_app.extensions['principal_cache']
+
+
+def load_principal(user_id):
+    """
+    Return the Principal for user_id, loading the user and all of their
+    account numbers and ids with a single query on a cache miss.
+    """
+    principal = _cache().get(user_id)
+    if principal is not None:
+        return principal
+
+    rows = db.session.execute(
+        select(User.id, User.username, User.is_admin, Account.account_number, Account.id.label('account_id'))
+        .outerjoin(Account, Account.user_id == User.id)
+        .where(User.id == user_id)
+        .order_by(Account.id)
+    ).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    principal = Principal(
+        id=first.id,
+        username=first.username,
+        is_admin=first.is_admin,
+        account_numbers=tuple(row.account_number for row in rows if row.account_number is not None),
+        account_ids=tuple(row.account_id for row in rows if row.account_id is not None)
+    )
+    _cache().put(principal)
+    return principal
+
+
+def current_principal():
+    """
+    The Principal behind the request's JWT, memoized for the rest of the request.
+    Returns None if the user no longer exists.
+    """
+    # Keyed on the decoded token object, which flask_jwt_extended creates per request
+    token = get_jwt()
+    if g.get('principal_token') is not token:
+        identity = get_jwt_identity()
+        g.principal = load_principal(identity.get("id")) if identity else None
+        g.principal_token = token
+    return g.principal
+
+
+def invalidate(*user_ids):
+    """
+    Drop cached Principals, for writes that bypass the ORM (bulk inserts).
+    """
+    cache = _cache()
+    for user_id in user_ids:
+        if user_id is not None:
+            cache.invalidate(user_id)
+
+
+def _owners_changed(target, *attributes):
+    """
+    Old and new user ids of an Account or User whose identifying attributes changed.
+    """
+    state = inspect(target)
+    owners = set()
+    for attribute in attributes:
+        history = state.attrs[attribute].history
+        owners.update(history.added)
+        owners.update(history.deleted)
+    return owners
+
+
+def _stage(target, user_ids):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('principal_invalidations', set()).update(user_ids)
+
+
+@event.listens_for(Account, 'after_insert')
+@event.listens_for(Account, 'after_delete')
+def _account_added_or_removed(mapper, connection, target):
+    _stage(target, {target.user_id})
+
+
+@event.listens_for(Account, 'after_update')
+def _account_updated(mapper, connection, target):
+    # Balance changes do not affect the principal; only ownership and numbers do
+    if inspect(target).attrs.account_number.history.has_changes():
+        _stage(target, {target.user_id})
+    _stage(target, _owners_changed(target, 'user_id'))
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    _stage(target, {target.id})
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    # Invalidate only once the change is visible, so a concurrent request
+    # cannot re-cache the pre-commit state after the entry was dropped.
+    # Releasing a savepoint fires this too; wait for the outermost commit.
+    if session.in_nested_transaction():
+        return
+    user_ids = session.info.pop('principal_invalidations', None)
+    if user_ids and has_app_context() and 'principal_cache' in current_app.extensions:
+        invalidate(*user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    # Keep what was staged before a rolled back savepoint; extra invalidations are harmless
+    if session.in_nested_transaction():
+        return
+    session.info.pop('principal_invalidations', None)
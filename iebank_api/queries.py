@@ -0,0 +1,124 @@
+from flask import current_app
+from sqlalchemy import and_, func, or_, select, union, union_all
+from iebank_api import db
+from iebank_api.models import ACCOUNT_CLOSED, Account, Transaction, TransactionArchive, User
+from iebank_api.serializers import ACCOUNT_COLUMNS
+
+
+def rows(query, stream=False):
+    """
+    Execute a read-only column query. Rows come back as plain tuples, so
+    nothing is hydrated into ORM instances or added to the identity map.
+
+    With stream, rows are fetched through a server-side cursor in batches of
+    STREAM_YIELD_PER instead of being buffered by the driver all at once;
+    the result must then be consumed before the session is closed.
+    """
+    if stream:
+        return db.session.execute(query.execution_options(
+            stream_results=True, yield_per=current_app.config['STREAM_YIELD_PER']
+        ))
+    return db.session.execute(query).all()
+
+
+def accounts(owner_id=None, after=None, limit=None):
+    """
+    Open accounts in id order, optionally only owner_id's, as ACCOUNT_COLUMNS
+    rows. after is the keyset cursor: the last id of the previous page.
+    """
+    query = select(*ACCOUNT_COLUMNS).where(Account.status != ACCOUNT_CLOSED)
+    if owner_id is not None:
+        query = query.where(Account.user_id == owner_id)
+    if after is not None:
+        query = query.where(Account.id > after)
+    query = query.order_by(Account.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def accounts_version(owner_id):
+    """
+    A string that changes whenever accounts() would return different rows
+    for owner_id: the count, summed row versions and highest id of the
+    owner's accounts. One aggregate over the owner's few rows, found through
+    ix_account_user; version is not indexed, so it is read from the rows.
+    """
+    count, versions, last_id = db.session.execute(
+        select(func.count(), func.sum(Account.version), func.max(Account.id)).where(Account.user_id == owner_id)
+    ).one()
+    return f"{count}-{versions or 0}-{last_id or 0}"
+
+
+def login_user(username):
+    """
+    The columns login needs; the row has the id, username, is_admin and
+    password_hash attributes PasswordHasher.verify_user reads.
+    """
+    return db.session.execute(
+        select(User.id, User.username, User.is_admin, User.password_hash).where(User.username == username)
+    ).first()
+
+
+def _history(model, account_ids, limit, cursor, start, end):
+    """
+    Newest-first history of account_ids in one transaction table (model is
+    Transaction or TransactionArchive), as TRANSACTION_COLUMNS-shaped rows.
+    """
+    newest_first = (model.transaction_date.desc(), model.id.desc())
+    filters = []
+    if start is not None:
+        filters.append(model.transaction_date >= start)
+    if end is not None:
+        filters.append(model.transaction_date < end)
+    if cursor is not None:
+        cursor_date, cursor_id = cursor
+        # The plain upper bound is implied by the OR, but only it lets
+        # Postgres prune the monthly partitions after the cursor
+        filters.append(model.transaction_date <= cursor_date)
+        filters.append(or_(
+            model.transaction_date < cursor_date,
+            and_(model.transaction_date == cursor_date, model.id < cursor_id)
+        ))
+
+    def side(column):
+        branch = (
+            select(model.id, model.transaction_date)
+            .where(column.in_(account_ids), *filters).order_by(*newest_first)
+        )
+        if limit is not None:
+            branch = branch.limit(limit)
+        return select(branch.subquery())
+
+    # Join back on the full (id, transaction_date) key and repeat the date
+    # bounds, so on partitioned Postgres each id probes only its own month
+    keys = union(side(model.sender_account_id), side(model.receiver_account_id)).subquery()
+    query = (
+        select(model.id, model.sender, model.receiver, model.amount, model.transaction_date)
+        .join(keys, and_(model.id == keys.c.id, model.transaction_date == keys.c.transaction_date))
+        .where(*filters).order_by(*newest_first)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def transaction_history(account_ids, limit=None, cursor=None, start=None, end=None, include_archived=False):
+    """
+    Build the newest-first history query for a set of account ids.
+
+    Instead of one OR across sender and receiver (which cannot use an index),
+    each side is a separate range scan on its (account id, transaction_date)
+    index, cut to the page size, and the two are merged with a UNION. Only
+    the hot table is read unless include_archived is set; then the archive
+    is searched the same way and the two pages are merged.
+    """
+    recent = _history(Transaction, account_ids, limit, cursor, start, end)
+    if not include_archived:
+        return recent
+    archived = _history(TransactionArchive, account_ids, limit, cursor, start, end)
+    both = union_all(recent.subquery().select(), archived.subquery().select()).subquery()
+    query = select(*both.c).order_by(both.c.transaction_date.desc(), both.c.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from cachetools import TTLCache
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+from iebank_api import metrics
+from iebank_api.models import User
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """
+    Sliding-window counters kept in process memory, evicting the least
+    recently used keys beyond maxsize.
+
+    The interface mirrors what a Redis backend would do with one sorted set
+    per key (ZADD, ZREMRANGEBYSCORE, ZCARD, DEL), so a shared backend can be
+    swapped in without touching the limiter.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _events(self, key, now, window):
+        events = self._windows.get(key)
+        if events is None:
+            events = self._windows[key] = deque()
+            if len(self._windows) > self.maxsize:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        while events and events[0] <= now - window:
+            events.popleft()
+        return events
+
+    def hit(self, key, now, window):
+        """
+        Record an event for key and return how many fall within the window.
+        """
+        with self._lock:
+            events = self._events(key, now, window)
+            events.append(now)
+            return len(events)
+
+    def count(self, key, now, window):
+        with self._lock:
+            if key not in self._windows:
+                return 0
+            return len(self._events(key, now, window))
+
+    def oldest(self, key):
+        with self._lock:
+            events = self._windows.get(key)
+            return events[0] if events else None
+
+    def reset(self, key):
+        with self._lock:
+            self._windows.pop(key, None)
+
+
+class LoginLimiter:
+    """
+    Rejects login attempts before they reach the database or the password hash:
+
+    - every attempt counts against the client IP (ip_limit per ip_window seconds)
+    - failed attempts count against the username (user_limit per user_window);
+      a successful login clears them
+    - usernames that were not found are remembered for unknown_ttl seconds and
+      answered without a query; the cache is per process, so a user created
+      on another worker is only seen here once the entry expires
+    """
+
+    def __init__(self, backend, ip_limit, ip_window, user_limit, user_window,
+                 unknown_size=10000, unknown_ttl=5):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        self.user_limit = user_limit
+        self.user_window = user_window
+        self._unknown = TTLCache(maxsize=unknown_size, ttl=unknown_ttl)
+        self._lock = threading.Lock()
+        self.counters = {"allowed": 0, "limited_ip": 0, "limited_user": 0, "unknown_user": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _retry_after(self, key, window):
+        oldest = self.backend.oldest(key)
+        if oldest is None:
+            return 1
+        return max(1, int(oldest + window - time.time()) + 1)
+
+    def check(self, ip, username):
+        """
+        Record the attempt and return the seconds to wait if it must be
+        rejected, otherwise None.
+        """
+        now = time.time()
+        ip_key = f"login:ip:{ip}"
+        # Rejected attempts are not recorded, so a flood cannot grow the window past the limit
+        if self.backend.count(ip_key, now, self.ip_window) >= self.ip_limit:
+            self._count("limited_ip")
+            return self._retry_after(ip_key, self.ip_window)
+        user_key = f"login:user:{username}"
+        if self.backend.count(user_key, now, self.user_window) >= self.user_limit:
+            self._count("limited_user")
+            return self._retry_after(user_key, self.user_window)
+        self.backend.hit(ip_key, now, self.ip_window)
+        self._count("allowed")
+        return None
+
+    def failed(self, username):
+        self.backend.hit(f"login:user:{username}", time.time(), self.user_window)
+
+    def succeeded(self, username):
+        self.backend.reset(f"login:user:{username}")
+
+    def is_unknown(self, username):
+        with self._lock:
+            unknown = username in self._unknown
+        if unknown:
+            self._count("unknown_user")
+        return unknown
+
+    def remember_unknown(self, username):
+        with self._lock:
+            self._unknown[username] = True
+
+    def forget_unknown(self, *usernames):
+        with self._lock:
+            for username in usernames:
+                self._unknown.pop(username, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, unknown_usernames=len(self._unknown))
+
+
+def init_app(app):
+    limiter = LoginLimiter(
+        MemoryBackend(maxsize=app.config['LOGIN_RATE_LIMIT_KEYS']),
+        ip_limit=app.config['LOGIN_RATE_LIMIT_IP'],
+        ip_window=app.config['LOGIN_RATE_LIMIT_IP_WINDOW'],
+        user_limit=app.config['LOGIN_RATE_LIMIT_USER'],
+        user_window=app.config['LOGIN_RATE_LIMIT_USER_WINDOW'],
+        unknown_size=app.config['UNKNOWN_USER_CACHE_SIZE'],
+        unknown_ttl=app.config['UNKNOWN_USER_CACHE_TTL']
+    )
+    app.extensions['login_limiter'] = limiter
+    metrics.register(app, 'login_rate_limit', limiter.stats)
+    return limiter
+
+
+def limiter():
+    return current_app.extensions['login_limiter']
+
+
+def client_ip():
+    """
+    The client address, taken from X-Forwarded-For when the app sits behind
+    TRUSTED_PROXIES reverse proxies.
+    """
+    proxies = current_app.config.get('TRUSTED_PROXIES', 0)
+    if proxies:
+        route = request.access_route
+        return route[max(0, len(route) - proxies)]
+    return request.remote_addr
+
+
+def forget_unknown(*usernames):
+    """
+    Drop usernames from the unknown-user cache, for inserts that bypass the ORM.
+    """
+    limiter().forget_unknown(*usernames)
+
+
+@event.listens_for(User, 'after_insert')
+def _user_created(mapper, connection, target):
+    if has_app_context() and 'login_limiter' in current_app.extensions:
+        current_app.extensions['login_limiter'].forget_unknown(target.username)
@@ -1,7 +1,13 @@
+import io
 import logging
-from flask import Blueprint, request, jsonify
-from iebank_api.models import Account, User, Transaction
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from iebank_api.models import ACCOUNT_CLOSED, Account, User, Transaction
 from iebank_api import db  # Import db here
+from iebank_api import account_numbers, balances, idempotency, importer, metrics, passwords, queries, ratelimit, stats, transfers
+from iebank_api.serializers import account_payload, transaction_payload
+from iebank_api.money import parse_amount
+from iebank_api.principal import current_principal
 from werkzeug.security import check_password_hash
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 
@@ -41,31 +47,24 @@ def register():
             logger.warning(f"User {username} already exists")
             return jsonify({"msg": "User already exists"}), 400
         
-        if len(password) < 8:
-            logger.warning(f"Password for user {username} is too short")
-            return jsonify({"msg": "Password must be at least 8 characters long"}), 400
-
-        has_number = [char.isdigit() for char in password]
-        has_upper = [char.isupper() for char in password]
-        
-        if not any(has_number) or not any(has_upper):
-            logger.warning(f"Password for user {username} is too weak. Must contain at least one uppercase letter and one number")
-            return jsonify({"msg": "Password must contain at least one uppercase letter and one number"}), 400
-
-        # Create and save the user
+        weakness = passwords.weakness(password)
+        if weakness:
+            logger.warning(f"Password for user {username} is too weak: {weakness}")
+            return jsonify({"msg": weakness}), 400
+
+        # Create the user and their default account in one commit. The user is
+        # flushed first and the account linked by id, so the only pending
+        # account insert is the one add_account runs inside its savepoint
         user = User(username=username)
-        user.set_password(password)
+        user.password_hash = passwords.hasher().hash(password)
         db.session.add(user)
-        db.session.commit()
-
-        logger.info(f"User {username} registered successfully")
-
+        db.session.flush()
         account = Account(name=f"{username}'s Account", currency="€", country=country)
-        account.user_id = user.id  # Link the account to the user
-        db.session.add(account)
+        account.user_id = user.id
+        account_numbers.add_account(account)
         db.session.commit()
 
-        logger.info(f"Default account created for user {username}")
+        logger.info(f"User {username} registered successfully with default account {account.account_number}")
         
         access_token = create_access_token(identity={"username": user.username, "is_admin": user.is_admin, "id": user.id})
         refresh_token = create_refresh_token(identity={"username": user.username, "is_admin": user.is_admin, "id": user.id})
@@ -77,6 +76,9 @@ def register():
             "is_admin": user.is_admin
         }), 201
 
+    except passwords.HasherBusy:
+        logger.warning("Password hashing pool saturated, rejecting registration")
+        return jsonify({"msg": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Error in register endpoint: {str(e)}")
         return jsonify({"error": f"An error occurred {str(e)}"}), 500
@@ -91,11 +93,25 @@ def login():
         username = request.json.get("username")
         password = request.json.get("password")
 
+        # Turn away abusive clients before touching the database or the hash
+        limiter = ratelimit.limiter()
+        retry_after = limiter.check(ratelimit.client_ip(), username)
+        if retry_after:
+            logger.warning(f"Login rate limit exceeded for user {username}")
+            return jsonify({"msg": "Too many login attempts, try again later"}), 429, {"Retry-After": str(retry_after)}
+
+        if limiter.is_unknown(username):
+            logger.warning(f"Login failed for unknown user {username}")
+            return jsonify({"msg": "Invalid username and/or password"}), 401
+
         # Fetch user from the database
-        user = User.query.filter_by(username=username).first()
+        user = queries.login_user(username)
+        if user is None:
+            limiter.remember_unknown(username)
 
-        # Verify password using the User model's method
-        if user and user.verify_password(password):
+        # Verify on the hashing pool; outdated hashes are upgraded in the background
+        if user and passwords.hasher().verify_user(user, password):
+            limiter.succeeded(username)
             logger.info(f"User {username} logged in successfully")
             # Generate JWT token
             access_token = create_access_token(identity={"username": user.username, "is_admin": user.is_admin, "id": user.id})
@@ -107,8 +123,12 @@ def login():
             "is_admin": user.is_admin
         }), 201
 
+        limiter.failed(username)
         logger.warning(f"Login failed for user {username}")
         return jsonify({"msg": "Invalid username and/or password"}), 401
+    except passwords.HasherBusy:
+        logger.warning("Password hashing pool saturated, rejecting login")
+        return jsonify({"msg": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
     except Exception as e:
         logger.error(f"Error in login endpoint: {str(e)}")
         return jsonify({"error": f"An error occurred {str(e)}"}), 500
@@ -127,7 +147,7 @@ def create_account():
         currency = request.json['currency']
         country = request.json['country']
         account = Account(name=name, currency=currency, country=country)
-        db.session.add(account)
+        account_numbers.add_account(account)
         db.session.commit()
         logger.info(f"Account created successfully for {name}")
         return jsonify({"msg": "Account created successfully"}), 201
@@ -138,6 +158,7 @@ def create_account():
 
 @api.route('/transfer/', methods=['POST'])
 @jwt_required()
+@idempotency.idempotent
 def transfer_money():
     logger.info("Transfer endpoint accessed")
 
@@ -145,41 +166,24 @@ def transfer_money():
         
         sender_account_number = request.json.get('sender_account_number')
         recipient_account_number = request.json.get('recipient_account_number')
-        transfer_amount = request.json.get('amount')
+        transfer_amount = parse_amount(request.json.get('amount'))
 
         if not transfer_amount or transfer_amount <= 0:
-            logger.warning(f"Invalid transfer amount: {transfer_amount}")
+            logger.warning(f"Invalid transfer amount: {request.json.get('amount')}")
             return jsonify({"msg": "Invalid transfer amount"}), 400
 
-        sender_account = Account.query.filter_by(account_number=sender_account_number).first()
-        recipient_account = Account.query.filter_by(account_number=recipient_account_number).first()
-        
-        # Check if the sender is the same as the user logged in
-        current_user = get_jwt_identity()
-        current_user_account = Account.query.filter_by(user_id=current_user.get("id")).first()
+        # Check if the sender is the same as the user logged in (admins may settle any account)
+        principal = current_principal()
         
-        if current_user.get("id") != current_user_account.user_id:
+        if not principal or (not principal.is_admin and sender_account_number not in principal.account_numbers):
             logger.warning("Someone other than the account owner attempted to transfer money")
             return jsonify({"msg": "You are not authorized to make this transaction"}), 403
 
-        if not sender_account:
-            logger.warning(f"Sender account {sender_account_number} not found")
-            return jsonify({"msg": "Sender account not found"}), 404
-        if not recipient_account:
-            logger.warning(f"Recipient account {recipient_account_number} not found")
-            return jsonify({"msg": "Recipient account not found"}), 404
-
-        if sender_account.balance < transfer_amount:
-            logger.warning(f"Insufficient funds in account {sender_account_number}")
-            return jsonify({"msg": "Insufficient funds"}), 400
-
-        sender_account.balance -= transfer_amount
-        recipient_account.balance += transfer_amount
-        
-        transaction = Transaction(sender=sender_account_number, receiver=recipient_account_number, amount=transfer_amount)
-        db.session.add(transaction)
-        
-        db.session.commit()
+        try:
+            transfers.transfer(sender_account_number, recipient_account_number, transfer_amount)
+        except transfers.TransferError as e:
+            logger.warning(f"Transfer from {sender_account_number} to {recipient_account_number} refused: {e.msg}")
+            return jsonify({"msg": e.msg}), e.status_code
 
         logger.info(f"Transfer of {transfer_amount} from {sender_account_number} to {recipient_account_number} completed successfully")
         return jsonify({
@@ -193,32 +197,83 @@ def transfer_money():
         return jsonify({"error": "An error occurred"}), 500
 
 
+def _int_arg(name):
+    """
+    Read an optional integer query parameter, raising ValueError on garbage.
+    """
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    return int(value)
+
+def _ndjson(rows, to_payload):
+    """
+    Yield one JSON document per row so the response never holds the full listing.
+    """
+    for row in rows:
+        yield current_app.json.dumps(to_payload(row)) + "\n"
+
+def _not_modified(etag):
+    """
+    A 304 for a conditional GET whose If-None-Match matches etag, else None.
+    """
+    if request.if_none_match.contains_weak(etag):
+        return _with_etag(Response(status=304), etag)
+    return None
+
+def _with_etag(response, etag):
+    if etag is None:
+        return response
+    # Clients may keep the body but must revalidate before every use
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @api.route('/accounts/', methods=['GET'])
 @jwt_required()
 def get_accounts():
     current_user = get_jwt_identity()
+    try:
+        limit = _int_arg('limit')
+        after = _int_arg('after')
+    except ValueError:
+        logger.warning("Invalid pagination parameters for accounts listing")
+        return jsonify({"msg": "limit and after must be integers"}), 400
+
+    max_limit = current_app.config['ACCOUNTS_PAGE_MAX_LIMIT']
+    if limit is not None and not 1 <= limit <= max_limit:
+        logger.warning(f"Invalid accounts page size: {limit}")
+        return jsonify({"msg": f"limit must be between 1 and {max_limit}"}), 400
+
+    stream = request.args.get('stream', '').lower() in ['true', '1', 't']
+
     if current_user.get("is_admin"):
         logger.info(f"Admin user {current_user.get('username')} retrieved all accounts")
-        accounts = Account.query.all()
+        owner_id = None
     else:
-        accounts = Account.query.filter_by(user_id=current_user.get("id")).all()
+        owner_id = current_user.get("id")
+    # Keyset pagination: the cursor is the last id of the previous page
+    query = queries.accounts(owner_id, after, limit)
+
     try:
         logger.info(f"{current_user}")
-        return jsonify({
-            "accounts": [
-                {
-                    "id": account.id,
-                    "name": account.name,
-                    "account_number": account.account_number,
-                    "balance": account.balance,
-                    "currency": account.currency,
-                    "status": account.status,
-                    "created_at": account.created_at,
-                    "country": account.country
-                }
-                for account in accounts
-            ]
-        })
+        # Polling clients revalidate; answer unchanged listings without querying them.
+        # Admin listings span every account, which no aggregate covers cheaply,
+        # so they are not ETagged
+        etag = queries.accounts_version(owner_id) if owner_id is not None else None
+        not_modified = _not_modified(etag) if etag is not None else None
+        if not_modified:
+            return not_modified
+
+        if stream:
+            return _with_etag(Response(stream_with_context(_ndjson(queries.rows(query, stream=True), account_payload)),
+                                       mimetype='application/x-ndjson'), etag)
+
+        accounts = queries.rows(query)
+        body = {"accounts": [account_payload(account) for account in accounts]}
+        if limit is not None:
+            body["next_after"] = accounts[-1].id if len(accounts) == limit else None
+        return _with_etag(jsonify(body), etag)
     except Exception as e:
         logger.error(f"Error retrieving accounts: {str(e)}")
         return jsonify({"error": "An error occurred"}), 500
@@ -229,9 +284,9 @@ def update_account(account_number):
     logger.info("Update account endpoint accessed")
     current_user = get_jwt_identity()
     
-    current_user_account = Account.query.filter_by(user_id=current_user.get("id")).first()
+    principal = current_principal()
     
-    if not current_user.get("is_admin") or (current_user_account and current_user.get("id") == current_user_account.user_id):
+    if not current_user.get("is_admin") or (principal and principal.account_numbers):
         logger.warning("Non-admin user or wrong user attempted to update an account")
         return jsonify({"msg": "Admin access required"}), 403
 
@@ -266,43 +321,67 @@ def delete_account(account_number):
 
     try:
         account = Account.query.filter_by(account_number=account_number).first()
-        if not account:
+        if not account or account.status == ACCOUNT_CLOSED:
             logger.warning(f"Account {account_number} not found")
             return jsonify({"msg": "Account not found"}), 404
 
-        db.session.delete(account)
+        # Soft delete: the row and its history stay, movements are refused
+        account.status = ACCOUNT_CLOSED
         db.session.commit()
-        logger.info(f"Account {account_number} deleted successfully")
+        logger.info(f"Account {account_number} closed")
         return jsonify({"msg": "Account deleted successfully"}), 200
     except Exception as e:
         logger.error(f"Error deleting account: {str(e)}")
         return jsonify({"error": "An error occurred"}), 500
+
+@api.route('/accounts/<account_number>/statement/', methods=['GET'])
+@jwt_required()
+def get_statement(account_number):
+    logger.info("Account statement endpoint accessed")
+    try:
+        # Inclusive dates; defaults to the last 30 days
+        end = datetime.fromisoformat(request.args['to']).date() if request.args.get('to') else datetime.utcnow().date()
+        start = datetime.fromisoformat(request.args['from']).date() if request.args.get('from') else end - timedelta(days=30)
+    except ValueError:
+        logger.warning("Invalid dates for account statement")
+        return jsonify({"msg": "Invalid from or to parameter"}), 400
+    if start > end:
+        return jsonify({"msg": "from must not be after to"}), 400
+
+    try:
+        principal = current_principal()
+        if not principal or (not principal.is_admin and account_number not in principal.account_numbers):
+            logger.warning(f"Unauthorized statement request for account {account_number}")
+            return jsonify({"msg": "You are not authorized to view this account"}), 403
+        # Owners' accounts are known to exist; admins may ask for any number
+        if principal.is_admin and not db.session.query(Account.id).filter_by(account_number=account_number).first():
+            logger.warning(f"Account {account_number} not found")
+            return jsonify({"msg": "Account not found"}), 404
+
+        return jsonify(balances.statement(account_number, start, end)), 200
+    except Exception as e:
+        logger.error(f"Error building statement: {str(e)}")
+        return jsonify({"error": "An error occurred"}), 500
     
 @api.route('/deposit/', methods=['POST'])
 @jwt_required()
+@idempotency.idempotent
 def deposit():
     logger.info("Deposit endpoint accessed")
     current_user = get_jwt_identity()
     # a user deposits money into their account as if they were making a deposit at an ATM
     try:
         account_number = request.json.get('account_number')
-        deposit_amount = request.json.get('amount')
+        deposit_amount = parse_amount(request.json.get('amount'))
         if not deposit_amount or deposit_amount <= 0:
-            logger.warning(f"Invalid deposit amount: {deposit_amount}")
+            logger.warning(f"Invalid deposit amount: {request.json.get('amount')}")
             return jsonify({"msg": "Invalid deposit amount"}), 400
 
-        account = Account.query.filter_by(account_number=account_number).first()
-        if not account:
-            logger.warning(f"Account {account_number} not found")
-            return jsonify({"msg": "Account not found"}), 404
-
-        account.balance += deposit_amount
-        
-        transaction = Transaction(sender=account_number, receiver=account_number, amount=deposit_amount)
-        
-        db.session.add(transaction)
-        
-        db.session.commit()
+        try:
+            transfers.deposit(account_number, deposit_amount)
+        except transfers.TransferError as e:
+            logger.warning(f"Deposit to account {account_number} refused: {e.msg}")
+            return jsonify({"msg": e.msg}), e.status_code
 
         logger.info(f"Deposit of {deposit_amount} to account {account_number} completed successfully")
         return jsonify({
@@ -315,77 +394,220 @@ def deposit():
         return jsonify({"error": "An error occurred"}), 500
     
 
+def _batch_request():
+    """
+    Validate the common {"operations": [...], "atomic": bool} batch body.
+    Returns (operations, atomic, error_response).
+    """
+    operations = request.json.get('operations')
+    atomic = request.json.get('atomic', True)
+    max_operations = current_app.config['BATCH_MAX_OPERATIONS']
+    if not isinstance(operations, list) or not operations or not all(isinstance(op, dict) for op in operations):
+        return None, None, (jsonify({"msg": "operations must be a non-empty list of objects"}), 400)
+    if len(operations) > max_operations:
+        return None, None, (jsonify({"msg": f"A batch may contain at most {max_operations} operations"}), 400)
+    if not isinstance(atomic, bool):
+        return None, None, (jsonify({"msg": "atomic must be a boolean"}), 400)
+    return operations, atomic, None
+
+def _batch_response(committed, results, atomic):
+    status_code = 200 if committed or not atomic else 400
+    return jsonify({
+        "msg": "Batch committed" if committed else "Batch rejected",
+        "committed": committed,
+        "results": results
+    }), status_code
+
+@api.route('/transfers/batch/', methods=['POST'])
+@jwt_required()
+@idempotency.idempotent
+def transfer_batch():
+    logger.info("Batch transfer endpoint accessed")
+    current_user = get_jwt_identity()
+    try:
+        operations, atomic, error = _batch_request()
+        if error:
+            logger.warning("Invalid batch transfer request")
+            return error
+
+        # Admins settle between any accounts; other users may only debit their own
+        owner_id = None if current_user.get("is_admin") else current_user.get("id")
+        committed, results = transfers.transfer_batch(operations, atomic=atomic, owner_id=owner_id)
+        logger.info(f"Batch transfer of {len(operations)} operations processed, committed: {committed}")
+        return _batch_response(committed, results, atomic)
+    except Exception as e:
+        logger.error(f"Error during batch transfer: {str(e)}")
+        return jsonify({"error": "An error occurred"}), 500
+
+@api.route('/deposits/batch/', methods=['POST'])
+@jwt_required()
+@idempotency.idempotent
+def deposit_batch():
+    logger.info("Batch deposit endpoint accessed")
+    try:
+        operations, atomic, error = _batch_request()
+        if error:
+            logger.warning("Invalid batch deposit request")
+            return error
+
+        committed, results = transfers.deposit_batch(operations, atomic=atomic)
+        logger.info(f"Batch deposit of {len(operations)} operations processed, committed: {committed}")
+        return _batch_response(committed, results, atomic)
+    except Exception as e:
+        logger.error(f"Error during batch deposit: {str(e)}")
+        return jsonify({"error": "An error occurred"}), 500
+
+
 @api.route('/user/accounts/', methods=['GET'])
 @jwt_required()
 def get_user_accounts():
     logger.info("Get user's accounts endpoint accessed")
     try:
-        current_user = get_jwt_identity()
-        username = current_user.get("username")
-
-        user = User.query.filter_by(username=username).first()
-        if not user:
+        principal = current_principal()
+        if not principal:
+            username = get_jwt_identity().get("username")
             logger.warning(f"User {username} not found")
             return jsonify({"msg": "User not found"}), 404
-        
-        accounts = Account.query.filter_by(user_id=user.id).all()
+        username = principal.username
+
+        etag = queries.accounts_version(principal.id)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            logger.info(f"Accounts of user {username} not modified")
+            return not_modified
+
+        accounts = queries.rows(queries.accounts(principal.id))
         logger.info(f"{len(accounts)} accounts retrieved for user {username}")
 
-        return jsonify({
-            "accounts": [
-                {
-                    "id": account.id,
-                    "name": account.name,
-                    "account_number": account.account_number,
-                    "balance": account.balance,
-                    "currency": account.currency,
-                    "status": account.status,
-                    "created_at": account.created_at,
-                    "country": account.country
-                }
-                for account in accounts
-            ]
-        }), 200
+        return _with_etag(jsonify({
+            "accounts": [account_payload(account) for account in accounts]
+        }), etag), 200
     except Exception as e:
         logger.error(f"Error retrieving user's accounts: {str(e)}")
         return jsonify({"error": "An error occurred"}), 500
 
+def _date_arg(name, end_of_range=False):
+    """
+    Parse an optional ISO 8601 date/datetime query parameter.
+
+    A bare date used as the end of a range covers that whole day, so it is
+    turned into an exclusive bound at the following midnight.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_range and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def _transaction_cursor(transaction):
+    return f"{transaction.transaction_date.isoformat()},{transaction.id}"
+
+def _parse_transaction_cursor(value):
+    timestamp, transaction_id = value.rsplit(',', 1)
+    return datetime.fromisoformat(timestamp), int(transaction_id)
+
 @api.route('/user/transactions/', methods=['GET'])
 @jwt_required()
 def get_user_transactions():
     logger.info("Get user's transactions endpoint accessed")
     try:
-        current_user = get_jwt_identity()
-        username = current_user.get("username")
+        limit = _int_arg('limit')
+        after = request.args.get('after')
+        cursor = _parse_transaction_cursor(after) if after else None
+        start = _date_arg('from')
+        end = _date_arg('to', end_of_range=True)
+        include_archived = request.args.get('include_archived', '').lower() in ['true', '1', 't']
+    except ValueError:
+        logger.warning("Invalid pagination or date parameters for transactions listing")
+        return jsonify({"msg": "Invalid limit, after, from or to parameter"}), 400
+
+    max_limit = current_app.config['ACCOUNTS_PAGE_MAX_LIMIT']
+    if limit is not None and not 1 <= limit <= max_limit:
+        logger.warning(f"Invalid transactions page size: {limit}")
+        return jsonify({"msg": f"limit must be between 1 and {max_limit}"}), 400
 
-        user = User.query.filter_by(username=username).first()
-        if not user:
+    try:
+        principal = current_principal()
+        if not principal:
+            username = get_jwt_identity().get("username")
             logger.warning(f"User {username} not found")
             return jsonify({"msg": "User not found"}), 404
+        username = principal.username
 
-        accounts = Account.query.filter_by(user_id=user.id).all()
-        account_numbers = [account.account_number for account in accounts]
-
-        # Now we order by transaction_date descending
-        transactions = Transaction.query\
-            .filter(Transaction.sender.in_(account_numbers) | Transaction.receiver.in_(account_numbers))\
-            .order_by(Transaction.transaction_date.desc())\
-            .all()
+        transactions = queries.rows(queries.transaction_history(
+            principal.account_ids, limit, cursor, start, end, include_archived
+        ))
 
         logger.info(f"{len(transactions)} transactions retrieved for user {username}")
 
-        return jsonify({
-            "transactions": [
-                {
-                    "id": transaction.id,
-                    "sender": transaction.sender,
-                    "receiver": transaction.receiver,
-                    "amount": transaction.amount,
-                    "timestamp": transaction.transaction_date
-                }
-                for transaction in transactions
-            ]
-        }), 200
+        body = {"transactions": [transaction_payload(transaction) for transaction in transactions]}
+        if limit is not None:
+            body["next_cursor"] = _transaction_cursor(transactions[-1]) if len(transactions) == limit else None
+        return jsonify(body), 200
     except Exception as e:
         logger.error(f"Error retrieving user's transactions: {str(e)}")
-        return jsonify({"error": "An error occurred"}), 500
\ No newline at end of file
+        return jsonify({"error": "An error occurred"}), 500
+
+@api.route('/users/import/', methods=['POST'])
+@jwt_required()
+def import_users():
+    logger.info("User import endpoint accessed")
+    current_user = get_jwt_identity()
+    if not current_user.get("is_admin"):
+        logger.warning("Non-admin user attempted to import users")
+        return jsonify({"msg": "Admin access required"}), 403
+
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if fmt not in importer.FORMATS:
+        return jsonify({"msg": f"Unsupported format {fmt}"}), 400
+
+    try:
+        # Read the body as it arrives instead of buffering the whole upload
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        result = importer.import_users(importer.read_rows(stream, fmt))
+        return jsonify(result.to_json()), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error importing users: {str(e)}")
+        return jsonify({"error": "An error occurred"}), 500
+
+@api.route('/metrics/', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    current_user = get_jwt_identity()
+    if not current_user.get("is_admin"):
+        logger.warning("Non-admin user attempted to read metrics")
+        return jsonify({"msg": "Admin access required"}), 403
+
+    try:
+        return jsonify(metrics.collect(current_app)), 200
+    except Exception as e:
+        logger.error(f"Error collecting metrics: {str(e)}")
+        return jsonify({"error": "An error occurred"}), 500
+
+@api.route('/admin/stats/', methods=['GET'])
+@jwt_required()
+def get_admin_stats():
+    current_user = get_jwt_identity()
+    if not current_user.get("is_admin"):
+        logger.warning("Non-admin user attempted to read dashboard stats")
+        return jsonify({"msg": "Admin access required"}), 403
+
+    max_days = current_app.config['ADMIN_STATS_MAX_DAYS']
+    try:
+        days = _int_arg('days')
+    except ValueError:
+        logger.warning(f"Invalid dashboard range: {request.args.get('days')}")
+        return jsonify({"msg": f"days must be an integer between 1 and {max_days}"}), 400
+    days = 30 if days is None else days
+    if not 1 <= days <= max_days:
+        logger.warning(f"Invalid dashboard range: {request.args.get('days')}")
+        return jsonify({"msg": f"days must be between 1 and {max_days}"}), 400
+
+    try:
+        return jsonify(stats.dashboard(days)), 200
+    except Exception as e:
+        logger.error(f"Error computing dashboard stats: {str(e)}")
+        return jsonify({"error": "An error occurred"}), 500
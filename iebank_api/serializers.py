@@ -0,0 +1,107 @@
+from datetime import date, datetime, timezone
+from flask.json.provider import DefaultJSONProvider
+from iebank_api.money import Money
+from iebank_api.models import Account, Transaction
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+# Columns the listing endpoints select instead of loading whole ORM entities
+ACCOUNT_COLUMNS = (
+    Account.id, Account.name, Account.account_number, Account.balance,
+    Account.currency, Account.status, Account.created_at, Account.country,
+)
+TRANSACTION_COLUMNS = (
+    Transaction.id, Transaction.sender, Transaction.receiver, Transaction.amount, Transaction.transaction_date,
+)
+
+# dumps() keyword arguments orjson can honour; anything else goes to the stdlib encoder
+_ORJSON_KWARGS = {'indent', 'separators'}
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date(value):
+    """
+    Same output as werkzeug.http.http_date (naive values are UTC), without
+    going through the email module; listings format one per row.
+    """
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return (f"{_DAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+            f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT")
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when it is installed.
+
+    Output matches the stdlib provider apart from non-ASCII characters being
+    sent as UTF-8 rather than escaped: keys stay sorted, Money is a JSON
+    number and dates use the HTTP date format.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Money):
+            return float(o)
+        if isinstance(o, date):
+            return http_date(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or not set(kwargs) <= _ORJSON_KWARGS:
+            return super().dumps(obj, **kwargs)
+        # Dates are passed through to default() to keep Flask's format
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits or non-string keys
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def account_payload(row):
+    """
+    API representation of an ACCOUNT_COLUMNS row. Unpacked by position:
+    looking columns up by name on a Row costs more than building the dict.
+    """
+    id, name, account_number, balance, currency, status, created_at, country = row
+    return {
+        "id": id,
+        "name": name,
+        "account_number": account_number,
+        "balance": balance,
+        "currency": currency,
+        "status": status,
+        "created_at": created_at,
+        "country": country
+    }
+
+
+def transaction_payload(row):
+    """
+    API representation of a TRANSACTION_COLUMNS row.
+    """
+    id, sender, receiver, amount, transaction_date = row
+    return {
+        "id": id,
+        "sender": sender,
+        "receiver": receiver,
+        "amount": amount,
+        "timestamp": transaction_date
+    }
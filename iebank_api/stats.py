@@ -0,0 +1,119 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from cachetools import TTLCache
+from flask import current_app
+from sqlalchemy import BigInteger, func, select, type_coerce
+from iebank_api import db, metrics
+from iebank_api.money import Money
+from iebank_api.models import Account, Transaction
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+
+def _day(value):
+    # SQLite's date() returns text, PostgreSQL's a date
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def compute(days):
+    """
+    Dashboard aggregates, each one GROUP BY query: balances by currency and
+    country, account counts by status, and transaction volume and count per
+    day for the last days days (UTC, today included).
+    """
+    # Sum raw cents so the database adds integers, not Money values
+    balance_cents = type_coerce(Account.balance, BigInteger)
+    balances = db.session.execute(
+        select(Account.currency, Account.country, func.sum(balance_cents), func.count())
+        .group_by(Account.currency, Account.country)
+        .order_by(Account.currency, Account.country)
+    ).all()
+    statuses = db.session.execute(
+        select(Account.status, func.count()).group_by(Account.status).order_by(Account.status)
+    ).all()
+
+    since = datetime.combine(datetime.utcnow().date() - timedelta(days=days - 1), datetime.min.time())
+    day = func.date(Transaction.transaction_date)
+    volume = db.session.execute(
+        select(day, func.sum(type_coerce(Transaction.amount, BigInteger)), func.count())
+        .where(Transaction.transaction_date >= since)
+        .group_by(day)
+        .order_by(day)
+    ).all()
+
+    return {
+        "balances": [{
+            "currency": currency,
+            "country": country,
+            "total_balance": Money.from_cents(cents or 0),
+            "accounts": count,
+        } for currency, country, cents, count in balances],
+        "accounts_by_status": {status: count for status, count in statuses},
+        "transactions_by_day": [{
+            "date": _day(date),
+            "volume": Money.from_cents(cents or 0),
+            "count": count,
+        } for date, cents, count in volume],
+        "days": days,
+        "generated_at": datetime.utcnow(),
+    }
+
+
+class StatsCache:
+    """
+    Computed dashboards keyed by their day range, kept for ttl seconds.
+
+    Only one request per process recomputes an expired entry; the others
+    wait for it instead of running the same aggregates in parallel.
+    """
+
+    def __init__(self, ttl, maxsize=32):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, days):
+        with self._lock:
+            stats = self._entries.get(days)
+            if stats is not None:
+                self.hits += 1
+            return stats
+
+    def get(self, days, compute=compute):
+        stats = self._cached(days)
+        if stats is not None:
+            return stats
+        with self._compute_lock:
+            # Someone may have filled it while we waited
+            stats = self._cached(days)
+            if stats is not None:
+                return stats
+            stats = compute(days)
+            with self._lock:
+                self.misses += 1
+                self._entries[days] = stats
+            logger.info(f"Admin stats for {days} days recomputed")
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": len(self._entries)}
+
+
+def init_app(app):
+    cache = StatsCache(ttl=app.config['ADMIN_STATS_CACHE_TTL'])
+    app.extensions['admin_stats'] = cache
+    metrics.register(app, 'admin_stats', cache.stats)
+    return cache
+
+
+def dashboard(days):
+    return current_app.extensions['admin_stats'].get(days)
@@ -0,0 +1,267 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from flask import g, request
+from iebank_api import metrics
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+
+class StubExporter:
+    """
+    Keeps exported batches in memory, for tests and offline runs.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def export(self, batch):
+        self.batches.append(list(batch))
+
+    @property
+    def items(self):
+        return [item for batch in self.batches for item in batch]
+
+
+class LogExporter:
+    """
+    Forwards each item as a log record carrying it as custom_dimensions,
+    the shape AzureLogHandler turns into Application Insights properties.
+    """
+
+    def __init__(self, target_logger):
+        self.target_logger = target_logger
+
+    def export(self, batch):
+        for item in batch:
+            self.target_logger.info(item.get("name", "telemetry"), extra={"custom_dimensions": item})
+
+
+def azure_exporter(connection_string):
+    """
+    A LogExporter writing to Application Insights, or None when opencensus is not installed.
+    """
+    try:
+        from opencensus.ext.azure.log_exporter import AzureLogHandler
+    except ImportError:
+        logger.warning("opencensus-ext-azure is not installed; telemetry export disabled")
+        return None
+
+    export_logger = logging.getLogger("iebank_api.telemetry.export")
+    export_logger.setLevel(logging.INFO)
+    export_logger.propagate = False
+    export_logger.addHandler(AzureLogHandler(connection_string=connection_string))
+    return LogExporter(export_logger)
+
+
+class TelemetryPipeline:
+    """
+    Bounded in-memory queue drained in batches by a background exporter thread.
+
+    submit() never blocks the caller: when the queue is full the item is
+    dropped and counted. The worker is (re)started lazily in the current
+    process, so the pipeline survives gunicorn forking after app creation.
+    """
+
+    def __init__(self, exporter, max_queue=10000, batch_size=100, flush_interval=1.0):
+        self.exporter = exporter
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueued = 0
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child inherits the queue but not the thread draining it
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._thread = threading.Thread(target=self._run, name="telemetry-exporter", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, item):
+        """
+        Queue one telemetry item; returns False if it was dropped.
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self):
+        """
+        Block until everything queued so far has been handed to the exporter.
+        """
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enqueued": self.enqueued,
+                "exported": self.exported,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+            }
+
+    def _run(self):
+        work = self._queue
+        while True:
+            batch = [work.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(work.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._export(batch)
+            for _ in batch:
+                work.task_done()
+
+    def _export(self, batch):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            with self._lock:
+                self.failed += len(batch)
+            logger.error(f"Telemetry export of {len(batch)} items failed: {str(e)}")
+            return
+        with self._lock:
+            self.exported += len(batch)
+
+
+class RouteSampler:
+    """
+    Per-endpoint sampling rates, e.g. {"api.transfer_money": 1.0, "api.home": 0.0}.
+    """
+
+    def __init__(self, rates, default_rate):
+        self.rates = rates
+        self.default_rate = default_rate
+
+    def should_sample(self, endpoint):
+        rate = self.rates.get(endpoint, self.default_rate)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def parse_sample_rates(value):
+    """
+    Accept a dict or an "endpoint=rate,endpoint=rate" string from the environment.
+    """
+    if isinstance(value, dict):
+        return {endpoint: float(rate) for endpoint, rate in value.items()}
+    rates = {}
+    for pair in filter(None, (part.strip() for part in (value or '').split(','))):
+        endpoint, rate = pair.split('=', 1)
+        rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+class TelemetryLogHandler(logging.Handler):
+    """
+    Logging handler that hands records to the pipeline instead of exporting inline.
+    """
+
+    def __init__(self, pipeline, level=logging.WARNING):
+        super().__init__(level)
+        self.pipeline = pipeline
+
+    def emit(self, record):
+        # The pipeline's own errors would otherwise feed back into it
+        if record.name.startswith(__name__):
+            return
+        try:
+            self.pipeline.submit({
+                "name": "log",
+                "logger": record.name,
+                "level": record.levelname,
+                "message": record.getMessage(),
+                "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            })
+        except Exception:
+            self.handleError(record)
+
+
+def _build_exporter(app):
+    kind = app.config['TELEMETRY_EXPORTER']
+    if kind == 'stub':
+        return StubExporter()
+    if kind == 'azure':
+        return azure_exporter(app.config['APPLICATIONINSIGHTS_CONNECTION_STRING'])
+    logger.warning(f"Unknown telemetry exporter {kind}; telemetry disabled")
+    return None
+
+
+def init_app(app):
+    """
+    Record sampled request telemetry and warning-or-worse log records off the request path.
+    """
+    if not app.config['TELEMETRY_ENABLED']:
+        return None
+    exporter = _build_exporter(app)
+    if exporter is None:
+        return None
+
+    pipeline = TelemetryPipeline(
+        exporter,
+        max_queue=app.config['TELEMETRY_MAX_QUEUE'],
+        batch_size=app.config['TELEMETRY_BATCH_SIZE'],
+        flush_interval=app.config['TELEMETRY_FLUSH_INTERVAL']
+    )
+    sampler = RouteSampler(
+        parse_sample_rates(app.config['TELEMETRY_SAMPLE_RATES']),
+        app.config['TELEMETRY_DEFAULT_SAMPLE_RATE']
+    )
+    app.extensions['telemetry'] = pipeline
+    metrics.register(app, 'telemetry', pipeline.stats)
+
+    api_logger = logging.getLogger('iebank_api')
+    for handler in [h for h in api_logger.handlers if isinstance(h, TelemetryLogHandler)]:
+        api_logger.removeHandler(handler)
+    api_logger.addHandler(TelemetryLogHandler(pipeline, level=app.config['TELEMETRY_LOG_LEVEL']))
+
+    @app.before_request
+    def _start_timer():
+        g.telemetry_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('telemetry_started', None)
+        if started is not None and sampler.should_sample(request.endpoint):
+            pipeline.submit({
+                "name": "request",
+                "endpoint": request.endpoint,
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            })
+        return response
+
+    return pipeline
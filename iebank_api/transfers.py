@@ -0,0 +1,261 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from iebank_api import balances, db, ledger
+from iebank_api.money import Money, parse_amount
+from iebank_api.models import ACCOUNT_CLOSED, Account, Transaction
+
+# Initialize logger for this module
+logger = logging.getLogger(__name__)
+
+
+class TransferError(Exception):
+    """
+    A money movement was refused; carries the message and HTTP status for the API.
+    """
+    status_code = 400
+
+    def __init__(self, msg):
+        super().__init__(msg)
+        self.msg = msg
+
+
+class AccountNotFound(TransferError):
+    status_code = 404
+
+
+class InsufficientFunds(TransferError):
+    pass
+
+
+class AccountClosed(TransferError):
+    status_code = 409
+
+
+def _apply_delta(account_number, delta):
+    """
+    Change one balance with a single conditional UPDATE and return the
+    account's (id, new balance), or None if the account is missing, closed
+    or cannot cover a debit.
+
+    Debits only match while the balance covers them, so the funds check and the
+    write are one atomic statement and concurrent transfers cannot lose updates.
+    The row stays locked until the surrounding transaction ends.
+    """
+    statement = update(Account).where(Account.account_number == account_number, Account.status != ACCOUNT_CLOSED)
+    if delta < 0:
+        statement = statement.where(Account.balance >= -delta)
+    result = db.session.execute(statement.values(balance=Account.balance + delta, version=Account.version + 1)
+                                .returning(Account.id, Account.balance))
+    return result.one_or_none()
+
+
+def _record(rows):
+    """
+    Insert Transaction rows (dicts of sender, receiver, their account ids,
+    amount and transaction_date) and their ledger postings, in the caller's
+    transaction.
+    """
+    transaction_ids = db.session.scalars(
+        insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True), rows
+    ).all()
+    ledger.post([
+        entry
+        for row, transaction_id in zip(rows, transaction_ids)
+        for entry in ledger.postings(transaction_id, row["sender"], row["receiver"], row["amount"],
+                                     row["transaction_date"])
+    ])
+
+
+def _refusal(sender_account_number, recipient_account_number):
+    """
+    Work out why a transfer was refused; only runs on the failure path.
+    """
+    statuses = dict(db.session.execute(
+        select(Account.account_number, Account.status)
+        .where(Account.account_number.in_([sender_account_number, recipient_account_number]))
+    ).all())
+    if sender_account_number not in statuses:
+        return AccountNotFound("Sender account not found")
+    if recipient_account_number not in statuses:
+        return AccountNotFound("Recipient account not found")
+    if ACCOUNT_CLOSED in statuses.values():
+        return AccountClosed("Account is closed")
+    return InsufficientFunds("Insufficient funds")
+
+
+def transfer(sender_account_number, recipient_account_number, amount):
+    """
+    Move amount between two accounts and record the Transaction and its
+    ledger postings in one commit.
+
+    Rows are updated in account number order so two opposite transfers always
+    lock in the same sequence and cannot deadlock. Raises a TransferError
+    subclass (after rolling back) if an account is missing or funds are short.
+    """
+    amount = Money(amount)
+    if sender_account_number == recipient_account_number:
+        # Would be recorded exactly like a deposit and replay as one
+        raise TransferError("Cannot transfer to the same account")
+    steps = sorted(
+        [(sender_account_number, -amount), (recipient_account_number, amount)],
+        key=lambda step: step[0]
+    )
+    try:
+        updated = {}
+        for account_number, delta in steps:
+            updated[account_number] = _apply_delta(account_number, delta)
+            if updated[account_number] is None:
+                db.session.rollback()
+                raise _refusal(sender_account_number, recipient_account_number)
+        sender, recipient = updated[sender_account_number], updated[recipient_account_number]
+
+        now = datetime.utcnow()
+        _record([{"sender": sender_account_number, "receiver": recipient_account_number,
+                  "sender_account_id": sender.id, "receiver_account_id": recipient.id,
+                  "amount": amount, "transaction_date": now}])
+        balances.record(now.date(), {
+            sender_account_number: (sender.balance, Money(0), amount, 1),
+            recipient_account_number: (recipient.balance, amount, Money(0), 1),
+        })
+        db.session.commit()
+    except TransferError:
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def deposit(account_number, amount):
+    """
+    Credit amount to an account and record the deposit Transaction in one commit.
+    """
+    amount = Money(amount)
+    try:
+        account = _apply_delta(account_number, amount)
+        if account is None:
+            db.session.rollback()
+            if db.session.query(Account.id).filter_by(account_number=account_number).first():
+                raise AccountClosed("Account is closed")
+            raise AccountNotFound("Account not found")
+
+        now = datetime.utcnow()
+        _record([{"sender": account_number, "receiver": account_number, "sender_account_id": account.id,
+                  "receiver_account_id": account.id, "amount": amount, "transaction_date": now}])
+        balances.record(now.date(), {account_number: (account.balance, amount, Money(0), 1)})
+        db.session.commit()
+    except TransferError:
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _apply_batch(movements, atomic, owner_id=None):
+    """
+    Apply a list of (sender, receiver, amount, is_deposit) movements with one commit.
+
+    Deposits only credit the receiver and are recorded with sender ==
+    receiver. Every account touched is loaded (and locked) with a single IN
+    query, balances are worked out in memory in request order, and the
+    Transaction rows and their ledger postings go out as two bulk INSERTs. With atomic=True any
+    failed item rolls back the whole batch; otherwise failed items are
+    skipped and the rest are committed. When owner_id is given, only
+    accounts owned by that user may be debited.
+
+    Returns (committed, results) with one result dict per movement.
+    """
+    # Anything that is not an account number string simply matches no account,
+    # and amounts that are not whole cents parse to None
+    movements = [
+        (sender if isinstance(sender, str) else None, receiver if isinstance(receiver, str) else None,
+         parse_amount(amount), is_deposit)
+        for sender, receiver, amount, is_deposit in movements
+    ]
+    numbers = {number for sender, receiver, _, _ in movements for number in (sender, receiver) if number}
+    accounts = {
+        account.account_number: account
+        for account in Account.query.filter(Account.account_number.in_(numbers))
+        .order_by(Account.account_number).with_for_update()
+    }
+    running = {number: account.balance for number, account in accounts.items()}
+    # account number -> [credits, debits, count] for the day's snapshot
+    totals = defaultdict(lambda: [Money(0), Money(0), 0])
+
+    results = []
+    rows = []
+    now = datetime.utcnow()
+    for index, (sender, receiver, amount, is_deposit) in enumerate(movements):
+        if not amount or amount <= 0:
+            error = "Invalid amount"
+        elif sender not in accounts:
+            error = "Account not found" if is_deposit else "Sender account not found"
+        elif receiver not in accounts:
+            error = "Recipient account not found"
+        elif ACCOUNT_CLOSED in (accounts[sender].status, accounts[receiver].status):
+            error = "Account is closed"
+        elif not is_deposit and sender == receiver:
+            error = "Cannot transfer to the same account"
+        elif not is_deposit and owner_id is not None and accounts[sender].user_id != owner_id:
+            error = "You are not authorized to make this transaction"
+        elif not is_deposit and running[sender] < amount:
+            error = "Insufficient funds"
+        else:
+            error = None
+
+        if error:
+            results.append({"index": index, "status": "failed", "msg": error})
+            continue
+
+        if not is_deposit:
+            running[sender] -= amount
+            totals[sender][1] += amount
+            totals[sender][2] += 1
+        running[receiver] += amount
+        totals[receiver][0] += amount
+        totals[receiver][2] += 1
+        rows.append({"sender": sender, "receiver": receiver, "sender_account_id": accounts[sender].id,
+                     "receiver_account_id": accounts[receiver].id, "amount": amount, "transaction_date": now})
+        results.append({"index": index, "status": "ok"})
+
+    failed = len(rows) < len(movements)
+    if not rows or (atomic and failed):
+        db.session.rollback()
+        return False, results
+
+    try:
+        for number, balance in running.items():
+            accounts[number].balance = balance
+        _record(rows)
+        balances.record(now.date(), {
+            number: (running[number], credits, debits, count) for number, (credits, debits, count) in totals.items()
+        })
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Batch of {len(rows)} movements committed ({len(movements) - len(rows)} failed)")
+    return True, results
+
+
+def transfer_batch(operations, atomic=True, owner_id=None):
+    """
+    Apply many transfers with one account lookup and one commit; see _apply_batch.
+    """
+    return _apply_batch(
+        [(op.get('sender_account_number'), op.get('recipient_account_number'), op.get('amount'), False)
+         for op in operations],
+        atomic, owner_id
+    )
+
+
+def deposit_batch(operations, atomic=True):
+    """
+    Apply many deposits with one account lookup and one commit; see _apply_batch.
+    """
+    return _apply_batch(
+        [(op.get('account_number'), op.get('account_number'), op.get('amount'), True) for op in operations],
+        atomic
+    )
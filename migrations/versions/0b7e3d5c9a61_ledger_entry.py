@@ -0,0 +1,64 @@
+"""Append-only ledger
+
+Revision ID: 0b7e3d5c9a61
+Revises: f41a7c9e8b20
+Create Date: 2026-10-18 17:35:52.104388
+
+Posts the existing transaction history to the ledger, plus an opening
+entry against EXTERNAL for any part of a balance the history does not
+explain, so `flask verify-ledger` passes straight after upgrading.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e3d5c9a61'
+down_revision = 'f41a7c9e8b20'
+branch_labels = None
+depends_on = None
+
+ENTRY_COLUMNS = 'INSERT INTO ledger_entry (transaction_id, account_number, amount, created_at) '
+UNEXPLAINED = (
+    'SELECT account_number, created_at, balance - COALESCE((SELECT SUM(e.amount) FROM ledger_entry e '
+    'WHERE e.account_number = account.account_number), 0) AS amount FROM account'
+)
+
+
+def upgrade():
+    op.create_table('ledger_entry',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('transaction_id', sa.Integer(), nullable=True),
+    sa.Column('account_number', sa.String(length=20), nullable=False),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ledger_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_ledger_entry_account_id', ['account_number', 'id'], unique=False)
+
+    op.create_table('ledger_checkpoint',
+    sa.Column('account_number', sa.String(length=20), nullable=False),
+    sa.Column('balance', sa.BigInteger(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('account_number')
+    )
+
+    # Amounts are integer cents: receivers are credited, senders (EXTERNAL for deposits) debited
+    op.execute(ENTRY_COLUMNS + 'SELECT id, receiver, amount, transaction_date FROM "transaction" ORDER BY id')
+    op.execute(ENTRY_COLUMNS + "SELECT id, CASE WHEN sender = receiver THEN 'EXTERNAL' ELSE sender END, "
+               '-amount, transaction_date FROM "transaction" ORDER BY id')
+    # EXTERNAL side first: its rows do not change the accounts' sums
+    op.execute(ENTRY_COLUMNS + f"SELECT NULL, 'EXTERNAL', -amount, created_at FROM ({UNEXPLAINED}) opening "
+               'WHERE amount <> 0')
+    op.execute(ENTRY_COLUMNS + f'SELECT NULL, account_number, amount, created_at FROM ({UNEXPLAINED}) opening '
+               'WHERE amount <> 0')
+
+
+def downgrade():
+    op.drop_table('ledger_checkpoint')
+    with op.batch_alter_table('ledger_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_ledger_entry_account_id')
+
+    op.drop_table('ledger_entry')
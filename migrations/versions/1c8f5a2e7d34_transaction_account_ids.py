@@ -0,0 +1,47 @@
+"""Transaction account id references
+
+Revision ID: 1c8f5a2e7d34
+Revises: 0b7e3d5c9a61
+Create Date: 2026-10-18 18:21:09.661472
+
+Existing rows are not backfilled here; run
+`flask backfill-transaction-accounts` after upgrading, before users rely
+on their transaction history.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c8f5a2e7d34'
+down_revision = '0b7e3d5c9a61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sender_account_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('receiver_account_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_transaction_sender_account_id', 'account',
+                                    ['sender_account_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_foreign_key('fk_transaction_receiver_account_id', 'account',
+                                    ['receiver_account_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index('ix_transaction_sender_account_date', ['sender_account_id', 'transaction_date'], unique=False)
+        batch_op.create_index('ix_transaction_receiver_account_date', ['receiver_account_id', 'transaction_date'], unique=False)
+        # History lookups no longer filter on the account number strings
+        batch_op.drop_index('ix_transaction_receiver_date')
+        batch_op.drop_index('ix_transaction_sender_date')
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_sender_date', ['sender', 'transaction_date'], unique=False)
+        batch_op.create_index('ix_transaction_receiver_date', ['receiver', 'transaction_date'], unique=False)
+        batch_op.drop_index('ix_transaction_receiver_account_date')
+        batch_op.drop_index('ix_transaction_sender_account_date')
+        batch_op.drop_constraint('fk_transaction_receiver_account_id', type_='foreignkey')
+        batch_op.drop_constraint('fk_transaction_sender_account_id', type_='foreignkey')
+        batch_op.drop_column('receiver_account_id')
+        batch_op.drop_column('sender_account_id')
@@ -0,0 +1,40 @@
+"""Transaction archive
+
+Revision ID: 2d9e6b1f4c58
+Revises: 1c8f5a2e7d34
+Create Date: 2026-10-18 19:04:27.318850
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d9e6b1f4c58'
+down_revision = '1c8f5a2e7d34'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('transaction_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('sender', sa.String(length=20), nullable=False),
+    sa.Column('receiver', sa.String(length=20), nullable=False),
+    sa.Column('sender_account_id', sa.Integer(), nullable=True),
+    sa.Column('receiver_account_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.BigInteger(), nullable=False),
+    sa.Column('transaction_date', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transaction_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_archive_sender_account_date', ['sender_account_id', 'transaction_date'], unique=False)
+        batch_op.create_index('ix_transaction_archive_receiver_account_date', ['receiver_account_id', 'transaction_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_archive_receiver_account_date')
+        batch_op.drop_index('ix_transaction_archive_sender_account_date')
+
+    op.drop_table('transaction_archive')
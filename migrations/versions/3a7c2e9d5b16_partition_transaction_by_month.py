@@ -0,0 +1,105 @@
+"""Partition transaction by month on Postgres
+
+Revision ID: 3a7c2e9d5b16
+Revises: 2d9e6b1f4c58
+Create Date: 2026-10-18 20:41:09.552417
+
+"""
+from datetime import date, datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7c2e9d5b16'
+down_revision = '2d9e6b1f4c58'
+branch_labels = None
+depends_on = None
+
+# Months created ahead of the current one; `flask create-transaction-partitions` keeps it rolling
+MONTHS_AHEAD = 3
+
+COLUMNS = 'id, sender, receiver, sender_account_id, receiver_account_id, amount, transaction_date'
+TABLE_BODY = """
+    id integer NOT NULL DEFAULT nextval('{sequence}'::regclass),
+    sender varchar(20) NOT NULL,
+    receiver varchar(20) NOT NULL,
+    sender_account_id integer,
+    receiver_account_id integer,
+    amount bigint NOT NULL,
+    transaction_date timestamp without time zone NOT NULL,
+    CONSTRAINT fk_transaction_sender_account_id FOREIGN KEY (sender_account_id)
+        REFERENCES account (id) ON DELETE SET NULL,
+    CONSTRAINT fk_transaction_receiver_account_id FOREIGN KEY (receiver_account_id)
+        REFERENCES account (id) ON DELETE SET NULL,
+"""
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _months(first, last):
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        yield month, _next_month(month)
+        month = _next_month(month)
+
+
+def _sequence(bind):
+    return bind.execute(sa.text("SELECT pg_get_serial_sequence('\"transaction\"', 'id')")).scalar()
+
+
+def _create_indexes():
+    op.execute('CREATE INDEX ix_transaction_date ON "transaction" (transaction_date)')
+    op.execute('CREATE INDEX ix_transaction_sender_account_date ON "transaction" (sender_account_id, transaction_date)')
+    op.execute('CREATE INDEX ix_transaction_receiver_account_date ON "transaction" (receiver_account_id, transaction_date)')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite (local runs and CI) keeps the single table
+        return
+    sequence = _sequence(bind)
+    # The partition key must be part of the primary key
+    op.execute(
+        f'CREATE TABLE transaction_partitioned ({TABLE_BODY.format(sequence=sequence)}'
+        '    PRIMARY KEY (id, transaction_date)\n) PARTITION BY RANGE (transaction_date)'
+    )
+    # Rows outside every monthly partition land here instead of failing the insert
+    op.execute('CREATE TABLE transaction_default PARTITION OF transaction_partitioned DEFAULT')
+    today = datetime.utcnow().date()
+    last = date(today.year, today.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    first = bind.execute(sa.text('SELECT min(transaction_date) FROM "transaction"')).scalar() or today
+    for start, end in _months(first, last):
+        op.execute(
+            f'CREATE TABLE transaction_y{start.year}m{start.month:02d} PARTITION OF transaction_partitioned '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    op.execute(f'INSERT INTO transaction_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM "transaction"')
+    # Keep the id sequence when the old table goes
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY transaction_partitioned.id')
+    op.execute('DROP TABLE "transaction"')
+    op.execute('ALTER TABLE transaction_partitioned RENAME TO "transaction"')
+    # Created on the parent, so every partition, present and future, gets them
+    _create_indexes()
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    sequence = _sequence(bind)
+    op.execute(
+        f'CREATE TABLE transaction_single ({TABLE_BODY.format(sequence=sequence)}'
+        '    PRIMARY KEY (id)\n)'
+    )
+    op.execute(f'INSERT INTO transaction_single ({COLUMNS}) SELECT {COLUMNS} FROM "transaction"')
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY transaction_single.id')
+    # Drops every partition with the parent
+    op.execute('DROP TABLE "transaction"')
+    op.execute('ALTER TABLE transaction_single RENAME TO "transaction"')
+    _create_indexes()
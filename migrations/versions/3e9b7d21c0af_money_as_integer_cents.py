@@ -0,0 +1,53 @@
+"""Money as integer cents
+
+Revision ID: 3e9b7d21c0af
+Revises: 8c3f1a2b9d4e
+Create Date: 2026-10-18 11:40:07.224913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9b7d21c0af'
+down_revision = '8c3f1a2b9d4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Convert the float amounts to whole cents before narrowing the column type
+    op.execute('UPDATE account SET balance = ROUND(balance * 100)')
+    op.execute('UPDATE "transaction" SET amount = ROUND(amount * 100)')
+
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.alter_column('balance',
+               existing_type=sa.Float(),
+               type_=sa.BigInteger(),
+               existing_nullable=False,
+               postgresql_using='balance::bigint')
+
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.alter_column('amount',
+               existing_type=sa.Float(),
+               type_=sa.BigInteger(),
+               existing_nullable=False,
+               postgresql_using='amount::bigint')
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.alter_column('amount',
+               existing_type=sa.BigInteger(),
+               type_=sa.Float(),
+               existing_nullable=False)
+
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.alter_column('balance',
+               existing_type=sa.BigInteger(),
+               type_=sa.Float(),
+               existing_nullable=False)
+
+    op.execute('UPDATE account SET balance = balance / 100.0')
+    op.execute('UPDATE "transaction" SET amount = amount / 100.0')
@@ -0,0 +1,28 @@
+"""Account user id index
+
+Revision ID: 4b8d3f0a6c27
+Revises: 3a7c2e9d5b16
+Create Date: 2026-10-18 21:37:52.114906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8d3f0a6c27'
+down_revision = '3a7c2e9d5b16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.create_index('ix_account_user', ['user_id', 'id'], unique=False)
+        batch_op.drop_index('ix_account_user_id')
+
+
+def downgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.create_index('ix_account_user_id', ['user_id'], unique=False)
+        batch_op.drop_index('ix_account_user')
@@ -0,0 +1,28 @@
+"""Transaction history indexes
+
+Revision ID: 8c3f1a2b9d4e
+Revises: 5a4fa7dc71c6
+Create Date: 2026-10-18 09:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f1a2b9d4e'
+down_revision = '5a4fa7dc71c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_sender_date', ['sender', 'transaction_date'], unique=False)
+        batch_op.create_index('ix_transaction_receiver_date', ['receiver', 'transaction_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_receiver_date')
+        batch_op.drop_index('ix_transaction_sender_date')
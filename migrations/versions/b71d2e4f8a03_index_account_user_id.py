@@ -0,0 +1,26 @@
+"""Index account.user_id
+
+Revision ID: b71d2e4f8a03
+Revises: 3e9b7d21c0af
+Create Date: 2026-10-18 13:05:52.806117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d2e4f8a03'
+down_revision = '3e9b7d21c0af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_account_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_account_user_id'))
@@ -0,0 +1,35 @@
+"""Add account_daily_balance snapshots
+
+Revision ID: c5d0e9a7f312
+Revises: b71d2e4f8a03
+Create Date: 2026-10-18 15:12:40.218734
+
+Existing history is not backfilled here; run `flask rebuild-balances` once
+after upgrading.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d0e9a7f312'
+down_revision = 'b71d2e4f8a03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('account_daily_balance',
+    sa.Column('account_number', sa.String(length=20), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('closing_balance', sa.BigInteger(), nullable=False),
+    sa.Column('credits', sa.BigInteger(), nullable=False),
+    sa.Column('debits', sa.BigInteger(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('account_number', 'day')
+    )
+
+
+def downgrade():
+    op.drop_table('account_daily_balance')
@@ -0,0 +1,26 @@
+"""Transaction date index
+
+Revision ID: d8a41c6e2f95
+Revises: c5d0e9a7f312
+Create Date: 2026-10-18 15:20:07.392816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a41c6e2f95'
+down_revision = 'c5d0e9a7f312'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_date', ['transaction_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_date')
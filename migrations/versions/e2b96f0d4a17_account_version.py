@@ -0,0 +1,26 @@
+"""Account version
+
+Revision ID: e2b96f0d4a17
+Revises: d8a41c6e2f95
+Create Date: 2026-10-18 16:02:44.810537
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b96f0d4a17'
+down_revision = 'd8a41c6e2f95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('account', schema=None) as batch_op:
+        batch_op.drop_column('version')
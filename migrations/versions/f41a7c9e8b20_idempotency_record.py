@@ -0,0 +1,40 @@
+"""Idempotency record
+
+Revision ID: f41a7c9e8b20
+Revises: e2b96f0d4a17
+Create Date: 2026-10-18 16:48:19.530264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f41a7c9e8b20'
+down_revision = 'e2b96f0d4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_record',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('idempotency_record', schema=None) as batch_op:
+        batch_op.create_index('uq_idempotency_record_user_key', ['user_id', 'key'], unique=True)
+        batch_op.create_index(batch_op.f('ix_idempotency_record_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('idempotency_record', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_idempotency_record_created_at'))
+        batch_op.drop_index('uq_idempotency_record_user_key')
+
+    op.drop_table('idempotency_record')
@@ -1,6 +1,12 @@
-from iebank_api.models import Account, User
+import json
+from datetime import datetime
 
-from iebank_api import db
+from iebank_api.models import Account, User, Transaction
+from iebank_api.money import Money
+
+from iebank_api import account_numbers, backfill, db
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
 
 # Test registration endpoint
 def test_register(client):
@@ -178,3 +184,617 @@ def test_get_accounts(client, create_user, create_account):
     data = response.get_json()
     assert "accounts" in data
     assert len(data["accounts"]) > 0
+
+
+def test_get_accounts_keyset_pagination(client, create_user):
+    """
+    Test admin account listing paginated with limit/after.
+    """
+    for i in range(5):
+        db.session.add(Account(name=f"Account {i}", currency="€", country="Spain"))
+    db.session.commit()
+
+    login_response = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    access_token = login_response.get_json()['access_token']
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    first = client.get('/api/accounts/?limit=3', headers=headers).get_json()
+    assert [a["name"] for a in first["accounts"]] == ["Account 0", "Account 1", "Account 2"]
+    assert first["next_after"] == first["accounts"][-1]["id"]
+
+    second = client.get(f'/api/accounts/?limit=3&after={first["next_after"]}', headers=headers).get_json()
+    assert [a["name"] for a in second["accounts"]] == ["Account 3", "Account 4"]
+    assert second["next_after"] is None
+
+    response = client.get('/api/accounts/?limit=0', headers=headers)
+    assert response.status_code == 400
+    response = client.get('/api/accounts/?after=abc', headers=headers)
+    assert response.status_code == 400
+
+
+def test_get_accounts_ndjson_stream(client, create_user):
+    """
+    Test the opt-in NDJSON streaming mode of the account listing.
+    """
+    for i in range(3):
+        db.session.add(Account(name=f"Account {i}", currency="€", country="Spain"))
+    db.session.commit()
+
+    login_response = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    access_token = login_response.get_json()['access_token']
+
+    response = client.get('/api/accounts/?stream=1', headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Account 0", "Account 1", "Account 2"]
+
+
+def test_get_user_transactions_paginated(client, create_user):
+    """
+    Test transaction history keyset pages and from/to date filters.
+    """
+    user = User.query.filter_by(username="testuser").first()
+    mine = Account(name="Mine", currency="€", country="Spain")
+    mine.user_id = user.id
+    other = Account(name="Other", currency="€", country="Spain")
+    db.session.add_all([mine, other])
+    db.session.commit()
+
+    for day in range(1, 6):
+        sender, receiver = (mine, other) if day % 2 else (other, mine)
+        transaction = Transaction(sender.account_number, receiver.account_number, float(day))
+        transaction.transaction_date = datetime(2024, 11, day, 12, 0)
+        db.session.add(transaction)
+    db.session.add(Transaction(other.account_number, other.account_number, 99.0))
+    db.session.commit()
+    # Rows written without account ids, as before the column existed
+    assert backfill.transaction_account_ids(batch_size=2) == 12
+
+    login_response = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    access_token = login_response.get_json()['access_token']
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    first = client.get('/api/user/transactions/?limit=2', headers=headers).get_json()
+    assert [t["amount"] for t in first["transactions"]] == [5.0, 4.0]
+    second = client.get(f'/api/user/transactions/?limit=2&after={first["next_cursor"]}', headers=headers).get_json()
+    assert [t["amount"] for t in second["transactions"]] == [3.0, 2.0]
+    third = client.get(f'/api/user/transactions/?limit=2&after={second["next_cursor"]}', headers=headers).get_json()
+    assert [t["amount"] for t in third["transactions"]] == [1.0]
+    assert third["next_cursor"] is None
+
+    ranged = client.get('/api/user/transactions/?from=2024-11-02&to=2024-11-03', headers=headers).get_json()
+    assert [t["amount"] for t in ranged["transactions"]] == [3.0, 2.0]
+
+    response = client.get('/api/user/transactions/?from=yesterday', headers=headers)
+    assert response.status_code == 400
+
+
+def test_batch_deposit_and_transfer(client, create_user):
+    """
+    Test batch deposits and transfers in atomic and best-effort modes.
+    """
+    first = Account(name="First", currency="€", country="Spain")
+    second = Account(name="Second", currency="€", country="Spain")
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    login_response = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    access_token = login_response.get_json()['access_token']
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = client.post('/api/deposits/batch/', json={"operations": [
+        {"account_number": first.account_number, "amount": 50.0},
+        {"account_number": first.account_number, "amount": 25.0},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["committed"] is True
+
+    # Atomic: the overdraft in the second item rejects the whole batch
+    response = client.post('/api/transfers/batch/', json={"operations": [
+        {"sender_account_number": first.account_number, "recipient_account_number": second.account_number, "amount": 70.0},
+        {"sender_account_number": first.account_number, "recipient_account_number": second.account_number, "amount": 10.0},
+    ]}, headers=headers)
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data["committed"] is False
+    assert [r["status"] for r in data["results"]] == ["ok", "failed"]
+    assert data["results"][1]["msg"] == "Insufficient funds"
+    assert first.balance == 75.0
+
+    # Best effort: the valid item is committed, the others are reported
+    response = client.post('/api/transfers/batch/', json={"atomic": False, "operations": [
+        {"sender_account_number": first.account_number, "recipient_account_number": second.account_number, "amount": 70.0},
+        {"sender_account_number": first.account_number, "recipient_account_number": second.account_number, "amount": 10.0},
+        {"sender_account_number": "missing", "recipient_account_number": second.account_number, "amount": 1.0},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [r["status"] for r in data["results"]] == ["ok", "failed", "failed"]
+    assert first.balance == 5.0
+    assert second.balance == 70.0
+    assert Transaction.query.count() == 3
+
+    response = client.post('/api/transfers/batch/', json={"operations": []}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_deposits_add_up_exactly(client, create_user, create_account):
+    """
+    Test that balances are exact cents rather than float sums.
+    """
+    login_response = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    access_token = login_response.get_json()['access_token']
+    headers = {"Authorization": f"Bearer {access_token}"}
+    account = Account.query.first()
+
+    for amount in [0.1, 0.2]:
+        response = client.post('/api/deposit/', json={
+            "account_number": account.account_number,
+            "amount": amount
+        }, headers=headers)
+        assert response.status_code == 200
+
+    assert account.balance == Money('0.30')
+    assert db.session.query(db.func.sum(Transaction.amount)).scalar() == Money('0.30')
+
+    response = client.post('/api/deposit/', json={
+        "account_number": account.account_number,
+        "amount": 0.001
+    }, headers=headers)
+    assert response.status_code == 400
+
+
+def test_principal_is_cached_between_requests(client, app, create_user):
+    """
+    Test that the user and account lookup is served from the principal cache
+    after the first request, and refreshed when an account changes hands.
+    """
+    user = User.query.filter_by(username="testuser").first()
+    account = Account(name="Mine", currency="€", country="Spain")
+    account.user_id = user.id
+    db.session.add(account)
+    db.session.commit()
+
+    login_response = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    access_token = login_response.get_json()['access_token']
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        client.get('/api/user/transactions/', headers=headers)
+        cold = len(statements)
+        statements.clear()
+        client.get('/api/user/transactions/', headers=headers)
+        warm = len(statements)
+    finally:
+        db.event.remove(db.engine, 'before_cursor_execute', count)
+    assert warm == cold - 1 == 1
+
+    second = Account(name="Second", currency="€", country="Spain")
+    second.user_id = user.id
+    db.session.add(second)
+    db.session.commit()
+
+    data = client.get('/api/user/accounts/', headers=headers).get_json()
+    assert len(data["accounts"]) == 2
+    cache = app.extensions['principal_cache']
+    assert second.account_number in cache.get(user.id).account_numbers
+
+
+def test_transfer_from_foreign_account_forbidden(client, create_user):
+    """
+    Test that a non-admin user cannot transfer out of someone else's account.
+    """
+    client.post('/api/register/', json={
+        "username": "newuser",
+        "password": "Password123",
+        "password_2": "Password123"
+    })
+    login_response = client.post('/api/login/', json={
+        "username": "newuser",
+        "password": "Password123"
+    })
+    access_token = login_response.get_json()['access_token']
+
+    victim = Account(name="Victim", currency="€", country="Spain")
+    db.session.add(victim)
+    db.session.commit()
+    own = User.query.filter_by(username="newuser").first().account[0]
+
+    response = client.post('/api/transfer/', json={
+        "sender_account_number": victim.account_number,
+        "recipient_account_number": own.account_number,
+        "amount": 1.0
+    }, headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 403
+
+
+def test_metrics_reports_pool_usage(client, create_user):
+    """
+    Test that admins can read connection pool metrics.
+    """
+    login_response = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    })
+    access_token = login_response.get_json()['access_token']
+
+    response = client.get('/api/metrics/', headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 200
+    assert "pool" in response.get_json()["db_pool"]["default"]
+
+
+def test_login_upgrades_outdated_hash(client, app):
+    """
+    Test that logging in with a hash from an older policy upgrades it.
+    """
+    user = User(username='legacy')
+    user.password_hash = generate_password_hash('Password123', 'pbkdf2:sha256:500')
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post('/api/login/', json={"username": "legacy", "password": "Password123"})
+    assert response.status_code == 201
+    app.extensions['password_hasher'].wait()
+
+    db.session.expire_all()
+    assert db.session.get(User, user.id).password_hash.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+    assert client.post('/api/login/', json={"username": "legacy", "password": "Password123"}).status_code == 201
+
+
+def test_login_rate_limited(client, app, create_user):
+    """
+    Test that repeated failed logins are rejected and unknown users are cached.
+    """
+    app.extensions['login_limiter'].user_limit = 2
+    for _ in range(2):
+        response = client.post('/api/login/', json={"username": "testuser", "password": "wrong"})
+        assert response.status_code == 401
+    response = client.post('/api/login/', json={"username": "testuser", "password": "testpassword"})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+    client.post('/api/login/', json={"username": "ghost", "password": "Password123"})
+    assert app.extensions['login_limiter'].is_unknown('ghost')
+    response = client.post('/api/register/', json={
+        "username": "ghost", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    assert response.status_code == 201
+    assert not app.extensions['login_limiter'].is_unknown('ghost')
+    assert client.post('/api/login/', json={"username": "ghost", "password": "Password123"}).status_code == 201
+
+
+def test_account_number_collision_is_retried(app):
+    """
+    Test that an account whose number is taken gets a fresh one instead of failing the commit.
+    """
+    existing = Account(name="Existing", currency="€", country="Spain")
+    db.session.add(existing)
+    db.session.commit()
+
+    clash = Account(name="Clash", currency="€", country="Spain")
+    clash.account_number = existing.account_number
+    account_numbers.add_account(clash)
+    db.session.commit()
+
+    assert clash.account_number != existing.account_number
+    assert account_numbers.is_valid(clash.account_number)
+    assert Account.query.count() == 2
+
+
+def test_register_retries_account_number_collision(client, monkeypatch):
+    """
+    Test that registration draws a fresh account number when the first one is taken.
+    """
+    existing = Account(name="Existing", currency="€", country="Spain")
+    db.session.add(existing)
+    db.session.commit()
+    monkeypatch.setattr('iebank_api.models.generate_account_number', lambda: existing.account_number)
+
+    response = client.post('/api/register/', json={
+        "username": "clasher", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    assert response.status_code == 201
+    account = User.query.filter_by(username="clasher").one().account[0]
+    assert account.account_number != existing.account_number
+    assert account_numbers.is_valid(account.account_number)
+
+
+def test_register_creates_user_and_account_in_one_commit(client, app):
+    """
+    Test that registration stores the user and the default account together.
+    """
+    commits = []
+
+    def count_commit(connection):
+        commits.append(connection)
+
+    event.listen(db.engine, 'commit', count_commit)
+    try:
+        response = client.post('/api/register/', json={
+            "username": "onecommit", "password": "Password123", "password_2": "Password123", "country": "Spain"
+        })
+    finally:
+        event.remove(db.engine, 'commit', count_commit)
+    assert response.status_code == 201
+    assert len(commits) == 1
+    user = User.query.filter_by(username="onecommit").one()
+    assert [account.country for account in user.account] == ["Spain"]
+
+
+def test_import_users(client, create_user):
+    """
+    Test that admins can bulk import users from CSV and NDJSON.
+    """
+    access_token = client.post('/api/login/', json={
+        "username": "testuser",
+        "password": "testpassword"
+    }).get_json()['access_token']
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    legacy_hash = generate_password_hash('Password123', 'pbkdf2:sha256:500')
+    csv_body = "username,password,country\nalice,Password123,Spain\nbob,weak,France\ntestuser,Password123,Spain\n"
+    response = client.post('/api/users/import/', data=csv_body, content_type='text/csv', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "imported": 1, "skipped": 1, "failed": 1,
+        "errors": [{"line": 3, "msg": "Password must be at least 8 characters long"}]
+    }
+
+    ndjson_body = "\n".join(json.dumps(row) for row in [
+        {"username": f"bulk{i}", "password_hash": legacy_hash} for i in range(5)
+    ] + [{"username": "bulk0", "password_hash": legacy_hash}]) + "\nnot json\n"
+    response = client.post('/api/users/import/?format=ndjson', data=ndjson_body, headers=headers)
+    result = response.get_json()
+    assert (result["imported"], result["failed"]) == (5, 2)
+
+    bulk = User.query.filter_by(username="bulk3").one()
+    assert len(bulk.account) == 1 and account_numbers.is_valid(bulk.account[0].account_number)
+    assert client.post('/api/login/', json={"username": "alice", "password": "Password123"}).status_code == 201
+    assert client.post('/api/login/', json={"username": "bulk3", "password": "Password123"}).status_code == 201
+
+    non_admin = client.post('/api/login/', json={"username": "alice", "password": "Password123"}).get_json()
+    response = client.post('/api/users/import/', data=csv_body, content_type='text/csv',
+                           headers={"Authorization": f"Bearer {non_admin['access_token']}"})
+    assert response.status_code == 403
+
+
+def test_account_statement(client, create_user):
+    """
+    Test that an account statement is served from the daily snapshots.
+    """
+    response = client.post('/api/register/', json={
+        "username": "saver", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    account = User.query.filter_by(username="saver").one().account[0]
+    client.post('/api/deposit/', json={"account_number": account.account_number, "amount": 40.0}, headers=headers)
+
+    today = datetime.utcnow().date().isoformat()
+    response = client.get(f'/api/accounts/{account.account_number}/statement/?from={today}&to={today}', headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data["opening_balance"], data["closing_balance"], data["credits"]) == (0.0, 40.0, 40.0)
+    assert data["days"] == [{"date": today, "credits": 40.0, "debits": 0.0, "transaction_count": 1, "closing_balance": 40.0}]
+
+    other = Account(name="Other", currency="€", country="Spain")
+    db.session.add(other)
+    db.session.commit()
+    response = client.get(f'/api/accounts/{other.account_number}/statement/', headers=headers)
+    assert response.status_code == 403
+    response = client.get(f'/api/accounts/{account.account_number}/statement/?from=2024-02-30', headers=headers)
+    assert response.status_code == 400
+
+def test_admin_stats(client, app, create_user):
+    """
+    Test that admins get SQL-aggregated dashboard numbers, cached between requests.
+    """
+    response = client.post('/api/login/', json={"username": "testuser", "password": "testpassword"})
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    spain = [Account(name=f"Spain {i}", currency="€", country="Spain") for i in range(2)]
+    france = Account(name="France", currency="€", country="France")
+    france.status = "Closed"
+    db.session.add_all(spain + [france])
+    db.session.commit()
+    for account, amount in [(spain[0], 10.5), (spain[1], 20.25)]:
+        client.post('/api/deposit/', json={"account_number": account.account_number, "amount": amount}, headers=headers)
+
+    response = client.get('/api/admin/stats/?days=7', headers=headers)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert {(row["country"], row["total_balance"], row["accounts"]) for row in data["balances"]} == \
+        {("Spain", 30.75, 2), ("France", 0.0, 1)}
+    assert data["accounts_by_status"] == {"Active": 2, "Closed": 1}
+    assert data["transactions_by_day"] == [{"date": datetime.utcnow().date().isoformat(), "volume": 30.75, "count": 2}]
+
+    # Served from the cache until the TTL expires
+    client.post('/api/deposit/', json={"account_number": spain[0].account_number, "amount": 1}, headers=headers)
+    assert client.get('/api/admin/stats/?days=7', headers=headers).get_json() == data
+    assert app.extensions['admin_stats'].stats()["hits"] == 1
+
+    assert client.get('/api/admin/stats/?days=0', headers=headers).status_code == 400
+    response = client.post('/api/register/', json={
+        "username": "viewer", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    viewer = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    assert client.get('/api/admin/stats/', headers=viewer).status_code == 403
+
+def test_account_listings_conditional_get(client, create_user):
+    """
+    Test that a matching If-None-Match gets a 304 without the listing query,
+    and that deposits and account updates change the ETag.
+    """
+    response = client.post('/api/register/', json={
+        "username": "poller", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    account_number = User.query.filter_by(username="poller").one().account[0].account_number
+    response = client.post('/api/login/', json={"username": "testuser", "password": "testpassword"})
+    admin = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+    response = client.get('/api/user/accounts/', headers=headers)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200 and etag.startswith('W/')
+    # Admin listings span every account and are not ETagged
+    assert "ETag" not in client.get('/api/accounts/', headers=admin).headers
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/api/user/accounts/', headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304 and response.data == b""
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    # Only the version aggregates ran, never the SELECT of account columns
+    assert statements and not any("account.name" in statement for statement in statements)
+
+    client.post('/api/deposit/', json={"account_number": account_number, "amount": 5}, headers=headers)
+    response = client.get('/api/user/accounts/', headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    etag = response.headers["ETag"]
+
+    client.put(f'/api/accounts/{account_number}/', json={"name": "Renamed"}, headers=admin)
+    assert client.get('/api/user/accounts/', headers={**headers, "If-None-Match": etag}).status_code == 200
+
+def test_idempotent_transfer_and_deposit(client, app):
+    """
+    Test that retries with an Idempotency-Key replay the first response
+    instead of moving money again, and that expired keys are swept.
+    """
+    from iebank_api.models import IdempotencyRecord
+    response = client.post('/api/register/', json={
+        "username": "retrier", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    token = response.get_json()['access_token']
+    payer = User.query.filter_by(username="retrier").one().account[0].account_number
+    payee = Account(name="Payee", currency="€", country="Spain")
+    db.session.add(payee)
+    db.session.commit()
+    payee_number = payee.account_number
+    store = app.extensions['idempotency']
+
+    def post(url, body, key):
+        return client.post(url, json=body, headers={"Authorization": f"Bearer {token}", "Idempotency-Key": key})
+
+    deposit = {"account_number": payer, "amount": 50}
+    first = post('/api/deposit/', deposit, "deposit-1")
+    retry = post('/api/deposit/', deposit, "deposit-1")
+    assert first.status_code == retry.status_code == 200
+    assert retry.get_json() == first.get_json() and retry.headers["Idempotent-Replayed"] == "true"
+
+    transfer = {"sender_account_number": payer, "recipient_account_number": payee_number, "amount": 30}
+    assert post('/api/transfer/', transfer, "transfer-1").status_code == 200
+    # Later requests are answered from the table once the process cache is gone
+    store._cache.clear()
+    assert post('/api/transfer/', transfer, "transfer-1").headers["Idempotent-Replayed"] == "true"
+    assert store.stats()["cache_replays"] == 1 and store.stats()["db_replays"] == 1
+
+    # Refusals are stored too, even though the service rolled back
+    too_much = {**transfer, "amount": 100}
+    assert post('/api/transfer/', too_much, "transfer-2").status_code == 400
+    deposit_more = post('/api/deposit/', {"account_number": payer, "amount": 100}, "deposit-2")
+    assert deposit_more.status_code == 200
+    assert post('/api/transfer/', too_much, "transfer-2").status_code == 400
+
+    assert post('/api/transfer/', {**transfer, "amount": 1}, "transfer-1").status_code == 422
+    assert post('/api/transfer/', transfer, "x" * 65).status_code == 400
+    balances = dict(db.session.execute(db.select(Account.account_number, Account.balance)).all())
+    assert (balances[payer], balances[payee_number]) == (Money('120'), Money('30'))
+    assert Transaction.query.count() == 3
+
+    db.session.execute(db.update(IdempotencyRecord).where(IdempotencyRecord.key == "deposit-1")
+                       .values(created_at=datetime(2000, 1, 1)))
+    db.session.commit()
+    assert store.sweep(force=True) == 1
+    assert IdempotencyRecord.query.count() == 3
+
+def test_delete_account_closes_it(client, create_user):
+    """
+    Test that deleting an account closes it: the row and its history stay,
+    listings hide it and new movements are refused.
+    """
+    response = client.post('/api/register/', json={
+        "username": "keeper", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    kept = User.query.filter_by(username="keeper").one().account[0]
+    doomed = Account(name="Doomed", currency="€", country="Spain")
+    db.session.add(doomed)
+    db.session.commit()
+    kept_number, doomed_number = kept.account_number, doomed.account_number
+    client.post('/api/deposit/', json={"account_number": kept_number, "amount": 20}, headers=headers)
+    transfer = {"sender_account_number": kept_number, "recipient_account_number": doomed_number, "amount": 5}
+    client.post('/api/transfer/', json=transfer, headers=headers)
+
+    response = client.post('/api/login/', json={"username": "testuser", "password": "testpassword"})
+    admin = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    assert client.delete(f'/api/accounts/{doomed_number}/', headers=admin).status_code == 200
+    assert client.delete(f'/api/accounts/{doomed_number}/', headers=admin).status_code == 404
+
+    assert Account.query.filter_by(account_number=doomed_number).one().status == "Closed"
+    listed = client.get('/api/accounts/', headers=admin).get_json()["accounts"]
+    assert doomed_number not in [account["account_number"] for account in listed]
+    response = client.post('/api/transfer/', json=transfer, headers=headers)
+    assert (response.status_code, response.get_json()["msg"]) == (409, "Account is closed")
+    response = client.post('/api/deposit/', json={"account_number": doomed_number, "amount": 1}, headers=headers)
+    assert response.status_code == 409
+    history = client.get('/api/user/transactions/', headers=headers).get_json()["transactions"]
+    assert [(t["receiver"], t["amount"]) for t in history] == [(doomed_number, 5.0), (kept_number, 20.0)]
+
+def test_archived_history(client, app):
+    """
+    Test that old transactions move to the archive in chunks, drop out of the
+    default history and come back with include_archived=1.
+    """
+    from iebank_api import archive
+    from iebank_api.models import TransactionArchive
+    response = client.post('/api/register/', json={
+        "username": "veteran", "password": "Password123", "password_2": "Password123", "country": "Spain"
+    })
+    headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    number = User.query.filter_by(username="veteran").one().account[0].account_number
+    for amount in range(1, 6):
+        client.post('/api/deposit/', json={"account_number": number, "amount": amount}, headers=headers)
+    # The first three deposits happened long ago
+    for day, transaction in enumerate(Transaction.query.order_by(Transaction.id).limit(3).all(), 1):
+        transaction.transaction_date = datetime(2020, 1, day)
+    db.session.commit()
+
+    assert archive.archive_transactions(horizon_days=365, chunk_size=2) == 3
+    assert (Transaction.query.count(), TransactionArchive.query.count()) == (2, 3)
+    assert archive.archive_transactions(horizon_days=365) == 0
+
+    recent = client.get('/api/user/transactions/', headers=headers).get_json()["transactions"]
+    assert [t["amount"] for t in recent] == [5.0, 4.0]
+    url = '/api/user/transactions/?include_archived=1&limit=3'
+    first = client.get(url, headers=headers).get_json()
+    assert [t["amount"] for t in first["transactions"]] == [5.0, 4.0, 3.0]
+    second = client.get(f'{url}&after={first["next_cursor"]}', headers=headers).get_json()
+    assert [t["amount"] for t in second["transactions"]] == [2.0, 1.0]
+    assert second["transactions"][-1]["timestamp"] == "Wed, 01 Jan 2020 00:00:00 GMT"
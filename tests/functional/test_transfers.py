@@ -0,0 +1,184 @@
+import os
+import random
+import threading
+from datetime import datetime
+
+import pytest
+
+from iebank_api import balances, create_app, db, ledger, transfers
+from iebank_api.models import Account, AccountDailyBalance, LedgerEntry, Transaction
+from iebank_api.money import Money
+
+THREADS = 8
+TRANSFERS_PER_THREAD = 25
+OPENING_BALANCE = 1000.0
+
+
+@pytest.fixture
+def shared_db_app(tmp_path):
+    """
+    An app backed by a real database file so several threads get their own connections.
+    Set STRESS_DATABASE_URL to run the same test against Postgres.
+    """
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': os.getenv('STRESS_DATABASE_URL', f"sqlite:///{tmp_path / 'stress.db'}"),
+    })
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_transfer_refusals(app):
+    """
+    GIVEN two accounts
+    WHEN a transfer names a missing account or exceeds the balance
+    THEN the matching TransferError is raised and nothing changes
+    """
+    sender = Account('Sender', '€', 'Spain')
+    recipient = Account('Recipient', '€', 'Spain')
+    db.session.add_all([sender, recipient])
+    db.session.commit()
+
+    with pytest.raises(transfers.AccountNotFound, match="Sender"):
+        transfers.transfer('missing', recipient.account_number, 10.0)
+    with pytest.raises(transfers.AccountNotFound, match="Recipient"):
+        transfers.transfer(sender.account_number, 'missing', 10.0)
+    with pytest.raises(transfers.InsufficientFunds):
+        transfers.transfer(sender.account_number, recipient.account_number, 10.0)
+
+    with pytest.raises(transfers.TransferError, match="same account"):
+        transfers.transfer(sender.account_number, sender.account_number, 10.0)
+
+    assert sender.balance == 0.0
+    assert recipient.balance == 0.0
+    assert Transaction.query.count() == 0
+
+
+def test_concurrent_transfers_lose_no_updates(shared_db_app):
+    """
+    GIVEN four funded accounts
+    WHEN several threads transfer between them in random directions at once
+    THEN every balance matches the recorded transactions and money is conserved
+    """
+    accounts = [Account(f'Stress {i}', '€', 'Spain') for i in range(4)]
+    for account in accounts:
+        account.balance = OPENING_BALANCE
+    db.session.add_all(accounts)
+    db.session.commit()
+    numbers = [account.account_number for account in accounts]
+
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        with shared_db_app.app_context():
+            for _ in range(TRANSFERS_PER_THREAD):
+                sender, recipient = rng.sample(numbers, 2)
+                try:
+                    transfers.transfer(sender, recipient, 1.0)
+                except Exception as e:  # pragma: no cover - reported below
+                    errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    completed = THREADS * TRANSFERS_PER_THREAD - len(errors)
+    assert not errors
+
+    db.session.expire_all()
+    assert Transaction.query.count() == completed
+    for account in Account.query.all():
+        sent = Transaction.query.filter_by(sender=account.account_number).count()
+        received = Transaction.query.filter_by(receiver=account.account_number).count()
+        assert account.balance == OPENING_BALANCE - sent + received
+    assert sum(account.balance for account in Account.query.all()) == OPENING_BALANCE * len(numbers)
+
+
+def test_daily_balances_match_rebuild(app):
+    """
+    GIVEN deposits, single transfers and a batch
+    WHEN the daily snapshots maintained along the way are compared with a rebuild from history
+    THEN both agree and the statement reflects the movements
+    """
+    first = Account('First', '€', 'Spain')
+    second = Account('Second', '€', 'Spain')
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    transfers.deposit(first.account_number, 100.0)
+    transfers.transfer(first.account_number, second.account_number, 30.0)
+    transfers.transfer_batch([
+        {"sender_account_number": second.account_number, "recipient_account_number": first.account_number, "amount": 5.0},
+        {"sender_account_number": first.account_number, "recipient_account_number": second.account_number, "amount": 1.5},
+    ])
+
+    def snapshots():
+        return sorted(
+            (row.account_number, row.day, row.closing_balance, row.credits, row.debits, row.transaction_count)
+            for row in AccountDailyBalance.query.all()
+        )
+
+    incremental = snapshots()
+    assert balances.rebuild() == 2
+    assert snapshots() == incremental
+
+    today = incremental[0][1]
+    statement = balances.statement(first.account_number, today, today)
+    assert statement["opening_balance"] == 0
+    assert statement["closing_balance"] == Money('73.50') == db.session.get(Account, first.id).balance
+    assert (statement["credits"], statement["debits"]) == (Money('105.00'), Money('31.50'))
+    assert statement["days"][0]["transaction_count"] == 4
+
+
+def test_ledger_reconciles_incrementally(app):
+    """
+    GIVEN deposits, transfers and a batch posted to the ledger
+    WHEN the ledger is verified, checkpointed and verified again after more movements
+    THEN every movement has a balanced debit and credit, balances reconcile
+    and only entries after the checkpoint are read; a failed check does not
+    advance the checkpoint
+    """
+    first = Account('First', '€', 'Spain')
+    second = Account('Second', '€', 'Spain')
+    db.session.add_all([first, second])
+    db.session.commit()
+    first_number, second_number = first.account_number, second.account_number
+
+    transfers.deposit(first_number, 100.0)
+    transfers.transfer(first_number, second_number, 30.0)
+    transfers.deposit_batch([{"account_number": second_number, "amount": 5.0}])
+    entries = [(entry.account_number, entry.amount) for entry in LedgerEntry.query.order_by(LedgerEntry.id)]
+    assert entries == [
+        (ledger.EXTERNAL, Money('-100')), (first_number, Money('100')),
+        (first_number, Money('-30')), (second_number, Money('30')),
+        (ledger.EXTERNAL, Money('-5')), (second_number, Money('5')),
+    ]
+    result = ledger.verify()
+    assert result.ok and result.accounts == 2
+
+    assert ledger.checkpoint(lag=0) == (6, 3)
+    transfers.transfer(second_number, first_number, 10.0)
+    assert ledger.ledger_balance(first_number) == Money('80') == db.session.get(Account, first.id).balance
+    assert ledger.verify().ok
+
+    # Drift in a cached balance and a one-sided posting are both reported
+    db.session.execute(db.update(Account).where(Account.account_number == second_number).values(balance=Money('1')))
+    db.session.execute(db.insert(LedgerEntry).values(
+        transaction_id=999, account_number=first_number, amount=Money('1'), created_at=datetime.utcnow()))
+    db.session.commit()
+    result = ledger.verify()
+    assert (result.mismatched, result.unbalanced, result.unbalanced_transactions) == (2, 1, [999])
+    assert result.mismatches[0]["ledger_balance"] == Money('81') and result.mismatches[1]["balance"] == Money('1')
+
+    # A failed check leaves the checkpoint alone, so the problems keep being reported
+    mark = ledger.high_water_mark()
+    outcome = app.test_cli_runner().invoke(args=['verify-ledger', '--checkpoint'])
+    assert outcome.exit_code == 1 and "Checkpoint not advanced" in outcome.output
+    assert ledger.high_water_mark() == mark and not ledger.verify().ok
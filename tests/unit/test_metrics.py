@@ -0,0 +1,23 @@
+from iebank_api import create_app, db
+from iebank_api.metrics import TimedQueuePool, pool_stats
+
+
+def test_timed_pool_records_waits(tmp_path):
+    """
+    GIVEN an app configured with a sized connection pool
+    WHEN connections are checked out
+    THEN the pool metrics report checkouts and wait times
+    """
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'pool.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 2, 'max_overflow': 0},
+    })
+    with app.app_context():
+        assert isinstance(db.engine.pool, TimedQueuePool)
+        with db.engine.connect():
+            stats = pool_stats(db.engine)
+            assert stats["checked_out"] == 1
+        stats = pool_stats(db.engine)
+        assert stats["size"] == 2
+        assert stats["checkouts"] == 1
+        assert stats["timeouts"] == 0
@@ -1,4 +1,6 @@
 from iebank_api.models import Account, User, Transaction
+from iebank_api.money import Money, parse_amount
+from iebank_api import account_numbers
 import pytest
 
 import datetime
@@ -77,3 +79,74 @@ def test_transaction_repr():
     """
     transaction = Transaction('SenderAccount123', 'ReceiverAccount456', 250.0)
     assert repr(transaction) == f'<Transaction {transaction.id}>'
+
+
+def test_money_is_exact():
+    """
+    GIVEN Money amounts
+    WHEN they are added, subtracted and converted to cents
+    THEN the result is exact and stays Money
+    """
+    total = Money(0.1) + Money(0.2)
+    assert total == Money('0.30')
+    assert isinstance(total, Money)
+    assert (Money('10.00') - Money('0.01')).cents == 999
+    assert Money.from_cents(12345) == Money('123.45')
+    with pytest.raises(TypeError):
+        Money('1.00') + 0.5
+
+
+def test_parse_amount():
+    """
+    GIVEN JSON amount values
+    WHEN they are parsed
+    THEN only finite amounts in whole cents become Money
+    """
+    assert parse_amount(100.0) == Money('100.00')
+    assert parse_amount(0.1) == Money('0.10')
+    assert parse_amount('12.5') == Money('12.50')
+    assert parse_amount(10.005) is None
+    assert parse_amount(True) is None
+    assert parse_amount('nan') is None
+    assert parse_amount(None) is None
+
+def test_account_numbers_are_checked_and_ordered():
+    """
+    GIVEN the account number generator
+    WHEN numbers are generated at increasing times
+    THEN they carry valid mod-97 check digits and sort in issue order
+    """
+    first = account_numbers.generate(now=1_700_000_000.000)
+    second = account_numbers.generate(now=1_700_000_000.001)
+    assert len(first) == 20 and first.isdigit()
+    assert account_numbers.is_valid(first) and account_numbers.is_valid(second)
+    assert first < second
+    tampered = first[:-3] + str((int(first[-3]) + 1) % 10) + first[-2:]
+    assert not account_numbers.is_valid(tampered)
+
+def test_read_queries_skip_the_identity_map(app):
+    """
+    GIVEN accounts owned by two users
+    WHEN they are listed through the read-only query layer, buffered and streamed
+    THEN plain rows come back in id order, filtered by owner, and no ORM instance is loaded
+    """
+    from iebank_api import db, queries
+    owner, other = User(username='owner'), User(username='other')
+    owner.set_password('Password1')
+    other.set_password('Password1')
+    for user, count in [(owner, 3), (other, 2)]:
+        for i in range(count):
+            user.account.append(Account(f'{user.username} {i}', '€', 'Spain'))
+        db.session.add(user)
+    db.session.commit()
+    owner_id = owner.id
+    db.session.expunge_all()
+
+    buffered = queries.rows(queries.accounts(owner_id))
+    streamed = list(queries.rows(queries.accounts(), stream=True))
+    assert [row.name for row in buffered] == ['owner 0', 'owner 1', 'owner 2']
+    assert [row.id for row in streamed] == sorted(row.id for row in streamed) and len(streamed) == 5
+    assert [row.id for row in queries.rows(queries.accounts(after=streamed[1].id, limit=2))] == \
+        [streamed[2].id, streamed[3].id]
+    assert queries.login_user('owner').password_hash.startswith('pbkdf2')
+    assert len(db.session.identity_map) == 0
@@ -0,0 +1,29 @@
+from datetime import date
+from iebank_api import create_app
+from iebank_api.partitions import ensure_partitions, is_partitioned, monthly_ranges
+
+
+def test_monthly_ranges_cover_each_month_once():
+    """
+    GIVEN a date span crossing a year end
+    WHEN the monthly partitions covering it are listed
+    THEN every month appears once with half-open bounds that chain together
+    """
+    ranges = list(monthly_ranges(date(2024, 11, 15), date(2025, 2, 3)))
+    assert [name for name, _, _ in ranges] == [
+        'transaction_y2024m11', 'transaction_y2024m12', 'transaction_y2025m01', 'transaction_y2025m02'
+    ]
+    assert ranges[1][1:] == (date(2024, 12, 1), date(2025, 1, 1))
+    assert all(previous[2] == following[1] for previous, following in zip(ranges, ranges[1:]))
+
+
+def test_sqlite_keeps_a_single_transaction_table():
+    """
+    GIVEN an application running on SQLite
+    WHEN future partitions are requested
+    THEN the table is reported as unpartitioned and nothing is created
+    """
+    app = create_app()
+    with app.app_context():
+        assert not is_partitioned()
+        assert ensure_partitions(months_ahead=3) == []
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from iebank_api.passwords import HasherBusy, PasswordHasher, needs_rehash
+
+
+def test_needs_rehash_detects_outdated_policy():
+    """
+    GIVEN hashes made with different methods and costs
+    WHEN they are checked against the configured policy
+    THEN only hashes that differ from the policy need a rehash
+    """
+    current = generate_password_hash('Password123', 'pbkdf2:sha256:1000')
+    assert needs_rehash(current, 'pbkdf2:sha256:1000') is False
+    assert needs_rehash(current, 'pbkdf2:sha256:2000') is True
+    assert needs_rehash(current, 'scrypt:16384:8:1') is True
+    # Defaults are expanded before comparing
+    assert needs_rehash(generate_password_hash('x', 'pbkdf2'), 'pbkdf2') is False
+
+
+def test_hasher_rejects_when_saturated():
+    """
+    GIVEN a hashing pool with one worker and no queue
+    WHEN a second job is submitted while the first is running
+    THEN it is rejected instead of queued
+    """
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=1, queue_size=0)
+    release = threading.Event()
+    hasher.submit(release.wait)
+    with pytest.raises(HasherBusy):
+        hasher.submit(release.wait)
+    release.set()
+    hasher.wait()
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.verify(hasher.hash('Password123'), 'Password123') is True
+
+
+def test_bulk_hashing_leaves_room_for_logins(monkeypatch):
+    """
+    GIVEN a hashing pool with two workers, no queue and one bulk slot
+    WHEN a bulk import is hashing
+    THEN an interactive hash still gets a worker instead of HasherBusy
+    """
+    release = threading.Event()
+
+    def slow_for_bulk(password, method):
+        if password.startswith('bulk'):
+            release.wait()
+        return generate_password_hash(password, method)
+
+    monkeypatch.setattr('iebank_api.passwords.generate_password_hash', slow_for_bulk)
+    hasher = PasswordHasher('pbkdf2:sha256:1000', workers=2, queue_size=0, bulk_slots=1)
+    results = []
+    importer = threading.Thread(target=lambda: results.extend(hasher.hash_many(['bulk1', 'bulk2', 'bulk3'])))
+    importer.start()
+    while not hasher.stats()["in_flight"]:
+        threading.Event().wait(0.01)
+
+    assert hasher.verify(hasher.hash('Password123'), 'Password123') is True
+    release.set()
+    importer.join()
+    assert len(results) == 3 and hasher.stats()["rejected"] == 0
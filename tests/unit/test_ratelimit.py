@@ -0,0 +1,39 @@
+from iebank_api.ratelimit import LoginLimiter, MemoryBackend
+
+
+def test_memory_backend_sliding_window():
+    """
+    GIVEN an in-memory backend
+    WHEN events are recorded over time
+    THEN only events inside the window are counted and old keys are evicted
+    """
+    backend = MemoryBackend(maxsize=2)
+    assert backend.hit('a', 0, 10) == 1
+    assert backend.hit('a', 5, 10) == 2
+    assert backend.count('a', 12, 10) == 1
+    backend.hit('b', 12, 10)
+    backend.hit('c', 12, 10)
+    assert backend.count('a', 12, 10) == 0
+
+
+def test_login_limiter_blocks_ip_and_username():
+    """
+    GIVEN a limiter allowing 3 attempts per IP and 2 failures per username
+    WHEN attempts exceed either limit
+    THEN further attempts are rejected with a retry delay
+    """
+    limiter = LoginLimiter(MemoryBackend(), ip_limit=3, ip_window=60, user_limit=2, user_window=60)
+    assert limiter.check('10.0.0.1', 'alice') is None
+    limiter.failed('alice')
+    assert limiter.check('10.0.0.2', 'alice') is None
+    limiter.failed('alice')
+    assert limiter.check('10.0.0.3', 'alice') >= 1
+
+    assert limiter.check('10.0.0.1', 'bob') is None
+    assert limiter.check('10.0.0.1', 'bob') is None
+    assert limiter.check('10.0.0.1', 'bob') >= 1
+    assert limiter.stats()["limited_ip"] == 1
+    assert limiter.stats()["limited_user"] == 1
+
+    limiter.succeeded('alice')
+    assert limiter.check('10.0.0.4', 'alice') is None
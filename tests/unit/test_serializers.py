@@ -0,0 +1,28 @@
+import json
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+from iebank_api import create_app
+from iebank_api.money import Money
+from iebank_api.serializers import JSONProvider
+
+
+def test_json_provider_matches_stdlib_output():
+    """
+    GIVEN a payload with Money, dates and nested values
+    WHEN it is encoded by the fast provider and by Flask's stdlib provider
+    THEN both decode to the same document
+    """
+    app = create_app()
+    payload = {
+        "balance": Money('12.30'),
+        "created_at": datetime(2024, 3, 1, 13, 5, 9, 123456),
+        "day": date(2024, 2, 29),
+        "nested": [{"b": 1, "a": None}],
+        "currency": "€",
+    }
+    fast = JSONProvider(app).dumps(payload)
+    stdlib = DefaultJSONProvider.dumps(JSONProvider(app), payload)
+    assert json.loads(fast) == json.loads(stdlib)
+    assert json.loads(fast)["created_at"] == "Fri, 01 Mar 2024 13:05:09 GMT"
+    assert fast.index('"balance"') < fast.index('"created_at"')
+    assert JSONProvider(app).loads(fast)["balance"] == 12.3
@@ -0,0 +1,82 @@
+import logging
+import threading
+
+from iebank_api import create_app
+from iebank_api.telemetry import RouteSampler, StubExporter, TelemetryPipeline, parse_sample_rates
+
+
+def test_pipeline_exports_in_batches():
+    """
+    GIVEN a telemetry pipeline with a stub exporter
+    WHEN items are submitted
+    THEN they reach the exporter in batches no larger than batch_size
+    """
+    exporter = StubExporter()
+    pipeline = TelemetryPipeline(exporter, batch_size=10, flush_interval=0.05)
+    for i in range(25):
+        assert pipeline.submit({"n": i})
+    pipeline.flush()
+
+    assert [item["n"] for item in exporter.items] == list(range(25))
+    assert all(len(batch) <= 10 for batch in exporter.batches)
+    assert pipeline.stats()["exported"] == 25
+
+
+def test_pipeline_drops_when_full():
+    """
+    GIVEN a pipeline whose exporter is stuck
+    WHEN more items arrive than the queue holds
+    THEN the extra items are dropped and counted instead of blocking
+    """
+    class BlockedExporter:
+        def __init__(self):
+            self.release = threading.Event()
+
+        def export(self, batch):
+            self.release.wait()
+
+    exporter = BlockedExporter()
+    pipeline = TelemetryPipeline(exporter, max_queue=5, batch_size=1, flush_interval=0.01)
+    results = [pipeline.submit({"n": i}) for i in range(20)]
+    exporter.release.set()
+    pipeline.flush()
+
+    assert results.count(False) == pipeline.stats()["dropped"] > 0
+
+
+def test_route_sampler():
+    """
+    GIVEN per-route sampling rates
+    WHEN endpoints are sampled
+    THEN rate 1.0 always samples, 0.0 never does and others use the default
+    """
+    sampler = RouteSampler(parse_sample_rates("api.transfer_money=1.0, api.home=0"), default_rate=0.0)
+    assert sampler.should_sample("api.transfer_money")
+    assert not sampler.should_sample("api.home")
+    assert not sampler.should_sample("api.get_accounts")
+
+
+def test_requests_recorded_off_the_request_path():
+    """
+    GIVEN an app with telemetry on and the stub exporter
+    WHEN requests are served
+    THEN sampled requests and warnings are exported by the background pipeline
+    """
+    app = create_app({
+        'TELEMETRY_ENABLED': True,
+        'TELEMETRY_EXPORTER': 'stub',
+        'TELEMETRY_SAMPLE_RATES': {'api.home': 1.0},
+        'TELEMETRY_DEFAULT_SAMPLE_RATE': 0.0,
+    })
+    client = app.test_client()
+    client.get('/api/')
+    client.get('/api/missing/')
+    logging.getLogger('iebank_api.routes').warning("something odd")
+
+    pipeline = app.extensions['telemetry']
+    pipeline.flush()
+    items = pipeline.exporter.items
+    requests = [item for item in items if item["name"] == "request"]
+    assert [item["endpoint"] for item in requests] == ["api.home"]
+    assert requests[0]["status"] == 200
+    assert any(item["name"] == "log" and item["message"] == "something odd" for item in items)